@@ -11,6 +11,13 @@ then
     echo "PostgreSQL started"
 fi
 
+# Start metrics from scratch, since the files left by old worker processes belong to the previous server run.
+if [ -n "$METRICS_DIR" ]
+then
+    rm -rf "$METRICS_DIR"
+    mkdir -p "$METRICS_DIR"
+fi
+
 python manage.py migrate --no-input
 python manage.py collectstatic --no-input
 
@@ -1,15 +1,27 @@
-# Vanilla game data used by the randomizer.
-
-from . import attacks
-from . import bosses
-from . import characters
-from . import chests
-from . import dialogs
-from . import enemies
-from . import formations
-from . import games
-from . import items
-from . import keys
-from . import locations
-from . import spells
-from . import battlescripts
+# Vanilla game data used by the randomizer.  Submodules are imported on first use, since some of them are very large
+# and plenty of code only needs one or two of them.
+
+import importlib
+
+__all__ = [
+    'attacks',
+    'bosses',
+    'characters',
+    'chests',
+    'dialogs',
+    'enemies',
+    'formations',
+    'games',
+    'items',
+    'keys',
+    'locations',
+    'spells',
+    'battlescripts',
+    'registry',
+]
+
+
+def __getattr__(name):
+    if name in __all__:
+        return importlib.import_module('.' + name, __name__)
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
@@ -8,6 +8,18 @@ class EnemyAttack:
     """Class representing an enemy attack."""
     BASE_ADDRESS = 0x391226
 
+    # Attack indexes are a single byte.
+    NUM_ATTACKS = 256
+
+    # ROM record layout for patch data.
+    LAYOUT = utils.RecordLayout(
+        ('attack_flags', 'B'),
+        ('hit_rate', 'B'),
+        ('status_effects', 'B'),
+        ('buffs', 'B'),
+        count=NUM_ATTACKS,
+    )
+
     # Default instance attributes.
     index = 0
     attack_level = 0
@@ -16,6 +28,8 @@ class EnemyAttack:
     status_effects = []
     buffs = []
 
+    world = utils.WeakAttribute()
+
     def __init__(self, world):
         """
 
@@ -44,19 +58,13 @@ class EnemyAttack:
         patch = Patch()
         base_addr = self.BASE_ADDRESS + (self.index * 4)
 
-        data = bytearray()
-
         # First byte is attack level + damage type flags in a bitmap.
         attack_flags = [i for i in range(3) if self.attack_level & (1 << i)]
         attack_flags += self.damage_types
-        data += utils.BitMapSet(1, attack_flags).as_bytes()
 
         # Other bytes are hit rate, status effects, and buffs.
-        data += utils.ByteField(self.hit_rate).as_bytes()
-        data += utils.BitMapSet(1, self.status_effects).as_bytes()
-        data += utils.BitMapSet(1, self.buffs).as_bytes()
-
-        patch.add_data(base_addr, data)
+        self.LAYOUT.add_record(patch, self.world.patch_tables, self.index, base_addr, utils.bits(attack_flags),
+                               self.hit_rate, utils.bits(self.status_effects), utils.bits(self.buffs))
         return patch
 
 
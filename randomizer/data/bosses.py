@@ -54,6 +54,8 @@ class StarLocation:
     star_address = 0x0
     has_star = False
 
+    world = utils.WeakAttribute()
+
     def __init__(self, world):
         """
 
@@ -103,6 +105,8 @@ class BossLocation:
     sprite_width = 32
     sprite_height = 32
 
+    world = utils.WeakAttribute()
+
     def __init__(self, world):
         """
 
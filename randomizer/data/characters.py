@@ -130,6 +130,25 @@ class Character:
     # Stats used during levelups.
     LEVEL_STATS = ["max_hp", "attack", "defense", "magic_attack", "magic_defense"]
 
+    # ROM record layout for starting character data.
+    STARTING_LAYOUT = utils.RecordLayout(
+        ('level', 'B'),
+        ('current_hp', 'H'),
+        ('max_hp', 'H'),
+        ('speed', 'B'),
+        ('attack', 'B'),
+        ('defense', 'B'),
+        ('magic_attack', 'B'),
+        ('magic_defense', 'B'),
+        ('xp', 'H'),
+        ('weapon', 'B'),
+        ('armor', 'B'),
+        ('accessory', 'B'),
+        ('unused', 'B'),
+        ('spells', 'I'),
+        count=5,
+    )
+
     # Base stats.
     original_name = ''
     index = 0
@@ -153,6 +172,8 @@ class Character:
     starting_growths = ()
     starting_bonuses = ()
 
+    world = utils.WeakAttribute()
+
     def __init__(self, world):
         """
 
@@ -236,27 +257,26 @@ class Character:
         """
         patch = Patch()
 
-        # Build character patch data.
-        char_data = bytearray()
-        char_data += utils.ByteField(self.starting_level).as_bytes()
-        char_data += utils.ByteField(self.max_hp, num_bytes=2).as_bytes()  # Current HP
-        char_data += utils.ByteField(self.max_hp, num_bytes=2).as_bytes()  # Max HP
-        char_data += utils.ByteField(self.speed).as_bytes()
-        char_data += utils.ByteField(self.attack).as_bytes()
-        char_data += utils.ByteField(self.defense).as_bytes()
-        char_data += utils.ByteField(self.magic_attack).as_bytes()
-        char_data += utils.ByteField(self.magic_defense).as_bytes()
-        char_data += utils.ByteField(self.xp, num_bytes=2).as_bytes()
-        # Set starting weapon/armor/accessory as blank for all characters.
-        char_data += utils.ByteField(0xff).as_bytes()
-        char_data += utils.ByteField(0xff).as_bytes()
-        char_data += utils.ByteField(0xff).as_bytes()
-        char_data.append(0x00)  # Unused byte
-        char_data += utils.BitMapSet(4, [spell.index for spell in self.starting_spells]).as_bytes()
-
-        # Base address plus offset based on character index.
+        # Build character patch data at the base address plus offset based on character index.  Current and max HP are
+        # both the max, and starting weapon/armor/accessory are blank for all characters.
         addr = self.BASE_ADDRESS + (self.index * 20)
-        patch.add_data(addr, char_data)
+        self.STARTING_LAYOUT.add_record(
+            patch, self.world.patch_tables, self.index, addr,
+            self.starting_level,
+            self.max_hp,
+            self.max_hp,
+            self.speed,
+            self.attack,
+            self.defense,
+            self.magic_attack,
+            self.magic_defense,
+            self.xp,
+            0xff,
+            0xff,
+            0xff,
+            0x00,
+            utils.bits(spell.index for spell in self.starting_spells),
+        )
 
         # Add levelup stat growth and bonuses to the patch data for this character.  Offset is 15 bytes for each stat
         # object, 3 bytes per character.
@@ -110,6 +110,8 @@ wish_dialogs = [
 
 
 class Wishes:
+    world = utils.WeakAttribute()
+
     def __init__(self, world):
         self.world = world
         self.wishes = []
@@ -140,6 +142,8 @@ wrong_indexes = [[1, 2], [0, 2], [0, 1]]
 
 
 class Quiz:
+    world = utils.WeakAttribute()
+
     def __init__(self, world):
         self.world = world
         self.questions = []
@@ -1,7 +1,7 @@
 # Data module for enemy data.
 
 from randomizer.logic import flags, utils
-from randomizer.logic.battleassembler import BattleScript
+from randomizer.logic.battleassembler import BattleScript, CopyOnWriteScript
 from randomizer.logic.patch import Patch
 from . import attacks
 from . import battlescripts
@@ -27,6 +27,39 @@ class Enemy:
     BASE_PSYCHOPATH_DATA_ADDRESS = 0x39a1d1
     NAME_BASE_ADDRESS = 0x3992d1
 
+    # ROM record layouts for patch data.
+    STATS_LAYOUT = utils.RecordLayout(
+        ('hp', 'H'),
+        ('speed', 'B'),
+        ('attack', 'B'),
+        ('defense', 'B'),
+        ('magic_attack', 'B'),
+        ('magic_defense', 'B'),
+        ('fp', 'B'),
+        ('evade', 'B'),
+        ('magic_evade', 'B'),
+        count=NUM_ENEMIES,
+    )
+    DEFENSE_LAYOUT = utils.RecordLayout(
+        ('hit_special_defense', 'B'),
+        ('resistances', 'B'),
+        ('weaknesses_approach', 'B'),
+        ('status_immunities', 'B'),
+        count=NUM_ENEMIES,
+    )
+    FLOWER_BONUS_LAYOUT = utils.RecordLayout(
+        ('flower_bonus', 'B'),
+        count=NUM_ENEMIES,
+    )
+    REWARD_LAYOUT = utils.RecordLayout(
+        ('xp', 'H'),
+        ('coins', 'B'),
+        ('yoshi_cookie_item', 'B'),
+        ('normal_item', 'B'),
+        ('rare_item', 'B'),
+        count=NUM_ENEMIES,
+    )
+
     # Default instance attributes.
     index = 0
     address = 0x000000
@@ -144,6 +177,8 @@ class Enemy:
 
     statue_mold = None
 
+    world = utils.WeakAttribute()
+
     def __init__(self, world):
         """
 
@@ -159,7 +194,7 @@ class Enemy:
         if self.rare_item is not None:
             self.rare_item = self.world.get_item_instance(self.rare_item)
         # Check world type....
-        self.script = list(battlescripts.scripts[self.index])
+        self.script = CopyOnWriteScript(battlescripts.scripts[self.index])
 
     def __str__(self):
         return "<{}>".format(self.name)
@@ -284,17 +319,16 @@ class Enemy:
             return self
 
         # Get all non-boss candidates sorted by rank.
-        candidates = [e for e in self.world.enemies if not e.boss]
-        candidates = sorted(candidates, key=lambda e: (e.rank, e.index))
+        candidates, positions = self.world.registry.enemy_rank_order()
 
         # If this is a special enemy, don't replace it.
         if self.rank < 0:
             return self
-        elif self not in candidates:
+        elif self not in positions:
             return self
 
-        # Sort by rank and mutate our position within the list to get a replacement enemy.
-        index = candidates.index(self)
+        # Mutate our position within the rank ordering to get a replacement enemy.
+        index = positions[self]
         index = utils.mutate_normal(index, maximum=len(candidates) - 1)
         return candidates[index]
 
@@ -327,56 +361,40 @@ class Enemy:
 
         """
         patch = Patch()
+        tables = self.world.patch_tables
 
         # Main stats.
-        data = bytearray()
-        data += utils.ByteField(self.hp, num_bytes=2).as_bytes()
-        data += utils.ByteField(self.speed).as_bytes()
-        data += utils.ByteField(self.attack).as_bytes()
-        data += utils.ByteField(self.defense).as_bytes()
-        data += utils.ByteField(self.magic_attack).as_bytes()
-        data += utils.ByteField(self.magic_defense).as_bytes()
-        data += utils.ByteField(self.fp).as_bytes()
-        data += utils.ByteField(self.evade).as_bytes()
-        data += utils.ByteField(self.magic_evade).as_bytes()
-        patch.add_data(self.address, data)
+        self.STATS_LAYOUT.add_record(patch, tables, self.index, self.address, self.hp, self.speed, self.attack,
+                                     self.defense, self.magic_attack, self.magic_defense, self.fp, self.evade,
+                                     self.magic_evade)
 
         # Special defense bits, sound on hit is top half.
-        data = bytearray()
         hit_special_defense = 1 if self.invincible else 0
         hit_special_defense |= (1 if self.death_immune else 0) << 1
         hit_special_defense |= self.morph_chance << 2
         hit_special_defense |= self.sound_on_hit
-        data.append(hit_special_defense)
-
-        # Elemental resistances.
-        data += utils.BitMapSet(1, self.resistances).as_bytes()
 
         # Elemental weaknesses byte (top half), sound on approach is bottom half.
-        weaknesses_approach = self.sound_on_approach
-        for weakness in self.weaknesses:
-            weaknesses_approach |= 1 << weakness
-        data.append(weaknesses_approach)
-
-        # Status immunities.
-        data += utils.BitMapSet(1, self.status_immunities).as_bytes()
+        weaknesses_approach = self.sound_on_approach | utils.bits(self.weaknesses)
 
-        patch.add_data(self.address + 11, data)
+        # Elemental resistances and status immunities are bitmaps.
+        self.DEFENSE_LAYOUT.add_record(patch, tables, self.index, self.address + 11, hit_special_defense,
+                                       utils.bits(self.resistances), weaknesses_approach,
+                                       utils.bits(self.status_immunities))
 
         # Flower bonus.
         bonus_addr = self.FLOWER_BONUS_BASE_ADDRESS + self.index
         bonus = self.flower_bonus_chance << 4
         bonus |= self.flower_bonus_type
-        patch.add_data(bonus_addr, utils.ByteField(bonus).as_bytes())
+        self.FLOWER_BONUS_LAYOUT.add_record(patch, tables, self.index, bonus_addr, bonus)
 
         # Build reward data patch.
-        data = bytearray()
-        data += utils.ByteField(self.xp, num_bytes=2).as_bytes()
-        data += utils.ByteField(self.coins).as_bytes()
-        data += utils.ByteField(self.yoshi_cookie_item.index if self.yoshi_cookie_item else 0xff).as_bytes()
-        data += utils.ByteField(self.normal_item.index if self.normal_item else 0xff).as_bytes()
-        data += utils.ByteField(self.rare_item.index if self.rare_item else 0xff).as_bytes()
-        patch.add_data(self.reward_address, data)
+        self.REWARD_LAYOUT.add_record(
+            patch, tables, self.index, self.reward_address, self.xp, self.coins,
+            self.yoshi_cookie_item.index if self.yoshi_cookie_item else 0xff,
+            self.normal_item.index if self.normal_item else 0xff,
+            self.rare_item.index if self.rare_item else 0xff,
+        )
 
         # If we have an override name, add to the patch data.
         if self.name_override:
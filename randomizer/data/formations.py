@@ -5,6 +5,9 @@ from randomizer.logic.patch import Patch
 from . import enemies
 from .bosses import Battlefields
 
+# Total number of formations in the data.
+NUM_FORMATIONS = 512
+
 
 class FormationMember:
     """Class representing a single enemy in a formation with metadata."""
@@ -24,11 +27,38 @@ class FormationMember:
         self.y_pos = y_pos
 
 
+def _members_layout(num_members):
+    """
+    Args:
+        num_members (int): Number of members in the formation.
+
+    Returns:
+        randomizer.logic.utils.RecordLayout: Layout for a formation record with this many members.
+
+    """
+    fields = [('monsters_present', 'B'), ('monsters_hidden', 'B')]
+    for i in range(num_members):
+        fields += [('enemy_{}'.format(i), 'B'), ('x_{}'.format(i), 'B'), ('y_{}'.format(i), 'B')]
+    return utils.RecordLayout(*fields, table='formation members', stride=26, count=NUM_FORMATIONS)
+
+
 class EnemyFormation:
     """Class representing an enemy formation for a battle."""
     BASE_ADDRESS = 0x39C000
     BASE_META_ADDRESS = 0x392AAA
 
+    # ROM record layouts for patch data.  Formation records only include the members present, so there is a layout for
+    # each number of members sharing the same table.
+    MEMBERS_LAYOUTS = [_members_layout(num_members) for num_members in range(9)]
+    META_LAYOUT = utils.RecordLayout(
+        ('event_at_start', 'B'),
+        ('music_run_flags', 'B'),
+        count=NUM_FORMATIONS,
+    )
+
+    # World this formation belongs to.
+    world = utils.WeakAttribute()
+
     # Valid x,y coordinates for enemies in formations based on vanilla data.
     VALID_COORDINATES = (
         (119, 111),
@@ -169,36 +199,27 @@ class EnemyFormation:
         :rtype: randomizer.logic.patch.Patch
         """
         patch = Patch()
+        tables = self.world.patch_tables if self.world else None
 
-        data = bytearray()
-
-        # Monsters present bitmap.
-        monsters_present = [7 - m.index for m in self.members]
-        data += utils.BitMapSet(1, monsters_present).as_bytes()
-
-        # Monsters hidden bitmap.
-        monsters_hidden = [7 - m.index for m in self.members if m.hidden_at_start]
-        data += utils.BitMapSet(1, monsters_hidden).as_bytes()
-
-        # Monster data.
+        # Monsters present and hidden bitmaps, then the monster data.
+        values = [
+            utils.bits(7 - m.index for m in self.members),
+            utils.bits(7 - m.index for m in self.members if m.hidden_at_start),
+        ]
         for member in self.members:
-            data += utils.ByteField(member.enemy.index).as_bytes()
-            data += utils.ByteField(member.x_pos).as_bytes()
-            data += utils.ByteField(member.y_pos).as_bytes()
+            values += [member.enemy.index, member.x_pos, member.y_pos]
 
         base_addr = self.BASE_ADDRESS + (self.index * 26)
-        patch.add_data(base_addr, data)
+        self.MEMBERS_LAYOUTS[len(self.members)].add_record(patch, tables, self.index, base_addr, *values)
 
         # Add formation metadata.
-        data = bytearray()
-        data += utils.ByteField(self.event_at_start if self.event_at_start is not None else 0xff).as_bytes()
         music_run_flags = self.music
         if not self.can_run_away:
             music_run_flags |= 0x03
-        data += utils.ByteField(music_run_flags).as_bytes()
-
         base_addr = self.BASE_META_ADDRESS + self.index * 3 + 1
-        patch.add_data(base_addr, data)
+        self.META_LAYOUT.add_record(patch, tables, self.index, base_addr,
+                                    self.event_at_start if self.event_at_start is not None else 0xff,
+                                    music_run_flags)
 
         return patch
 
@@ -209,6 +230,21 @@ class FormationPack:
     """
     BASE_ADDRESS = 0x39222A
 
+    # Total number of formation packs in the data.
+    NUM_PACKS = 256
+
+    # ROM record layout for patch data.
+    LAYOUT = utils.RecordLayout(
+        ('formation_1', 'B'),
+        ('formation_2', 'B'),
+        ('formation_3', 'B'),
+        ('high_bank', 'B'),
+        count=NUM_PACKS,
+    )
+
+    # World this formation pack belongs to.
+    world = utils.WeakAttribute()
+
     def __init__(self, index, formations):
         """
         :type index: int
@@ -236,7 +272,7 @@ class FormationPack:
         """
         patch = Patch()
 
-        data = bytearray()
+        values = []
 
         hi_num = False
         for formation in self.formations:
@@ -247,14 +283,13 @@ class FormationPack:
                 hi_num = True
                 val -= 255
 
-            data += utils.ByteField(val).as_bytes()
+            values.append(val)
 
         # High bank indicator.
-        val = 7 if hi_num else 0
-        data += utils.ByteField(val).as_bytes()
+        values.append(7 if hi_num else 0)
 
         base_addr = self.BASE_ADDRESS + (self.index * 4)
-        patch.add_data(base_addr, data)
+        self.LAYOUT.add_record(patch, self.world.patch_tables if self.world else None, self.index, base_addr, *values)
 
         return patch
 
@@ -3384,11 +3419,13 @@ def get_default_enemy_formations(world):
 
     # Get leaders for each formation based on common enemies in packs.
     for p in formation_packs:
+        p.world = world
         common_enemies = set(p.common_enemies)
         for f in p.formations:
             f.leaders |= common_enemies
 
     for f in formations:
+        f.world = world
         if not f.leaders:
             f.leaders = [m.enemy for m in f.members]
         f.leaders = sorted(f.leaders, key=lambda m: m.index)
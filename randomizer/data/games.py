@@ -1,17 +1,68 @@
 # Data module for minigame data.
 
+import array
+import os
+import sys
+
 from randomizer.logic import utils
 from randomizer.logic.patch import Patch
 
 
 # ******** Ball Solitaire
 
+# Library of solvable ball solitaire boards as 16-bit little endian bitmaps, built by the buildsolitaireboards command.
+SOLVABLE_BOARDS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ball_solitaire_boards.bin')
+_solvable_boards = None
+_vanilla_patches = {}
+
+
+def get_solvable_boards():
+    """Load the precomputed solvable board library the first time it's needed.
+
+    Returns:
+        array.array: Sorted board bitmaps in spot bit order.
+
+    """
+    global _solvable_boards
+    if _solvable_boards is None:
+        boards = array.array('H')
+        with open(SOLVABLE_BOARDS_FILE, 'rb') as f:
+            boards.frombytes(f.read())
+        if sys.byteorder != 'little':
+            boards.byteswap()
+        _solvable_boards = boards
+    return _solvable_boards
+
+
+def get_vanilla_patch(game_class):
+    """Get the patch data for a minigame's vanilla puzzle, for worlds that never built the game.  Built once and
+    shared.
+
+    Args:
+        game_class (type): BallSolitaireGame or MagicButtonsGame.
+
+    Returns:
+        randomizer.logic.patch.Patch: Patch data.  Shared, don't modify it.
+
+    """
+    patch = _vanilla_patches.get(game_class)
+    if patch is None:
+        patch = _vanilla_patches[game_class] = game_class(None).get_patch()
+    return patch
+
+
 class BallSolitaireGame:
     """Class for ball solitaire minigame."""
 
     class BallSpot:
         """Class for individual ball spot in the game."""
 
+        # Neighbouring spots link to each other, and the game's spot list owns them all.
+        up = utils.WeakAttribute()
+        down = utils.WeakAttribute()
+        left = utils.WeakAttribute()
+        right = utils.WeakAttribute()
+
         def __init__(self, has_ball=False):
             self.has_ball = has_ball
             self.up = None
@@ -94,6 +145,8 @@ class BallSolitaireGame:
 
     BASE_ADDRESS = 0x20c0e5
 
+    world = utils.WeakAttribute()
+
     def __init__(self, world):
         """
 
@@ -223,6 +276,27 @@ class BallSolitaireGame:
     def num_balls(self):
         return len([s for s in self.spots if s.has_ball])
 
+    @property
+    def board(self):
+        """
+        Returns:
+            int: Bitmap of spots that have a ball, in 0-indexed spot order.
+        """
+        result = 0
+        for i, spot in enumerate(self.spots):
+            if spot.has_ball:
+                result |= (1 << i)
+        return result
+
+    @board.setter
+    def board(self, value):
+        """
+        Args:
+            value (int): Bitmap of spots that have a ball, in 0-indexed spot order.
+        """
+        for i, spot in enumerate(self.spots):
+            spot.has_ball = bool((value >> i) & 1)
+
     def get_patch(self):
         """
 
@@ -233,11 +307,7 @@ class BallSolitaireGame:
         patch = Patch()
 
         # Balls should be in 0-indexed bit order already.
-        result = 0
-        for i, spot in enumerate(self.spots):
-            if spot.has_ball:
-                result |= (1 << i)
-        patch.add_data(self.BASE_ADDRESS, utils.ByteField(result, num_bytes=2).as_bytes())
+        patch.add_data(self.BASE_ADDRESS, utils.ByteField(self.board, num_bytes=2).as_bytes())
 
         return patch
 
@@ -250,6 +320,12 @@ class MagicButtonsGame:
     class ButtonSpot:
         """Class for individual button spot in the game."""
 
+        # Neighbouring spots link to each other, and the game's spot list owns them all.
+        up = utils.WeakAttribute()
+        down = utils.WeakAttribute()
+        left = utils.WeakAttribute()
+        right = utils.WeakAttribute()
+
         def __init__(self, pressed=False):
             self.pressed = pressed
             self.up = None
@@ -277,6 +353,8 @@ class MagicButtonsGame:
 
     BASE_ADDRESS = 0x205137
 
+    world = utils.WeakAttribute()
+
     def __init__(self, world):
         """
 
@@ -30,6 +30,31 @@ class Item:
     # Total number of items in the data.
     NUM_ITEMS = 256
 
+    # ROM record layouts for patch data.
+    EQUIP_LAYOUT = utils.RecordLayout(
+        ('item_type', 'B'),
+        ('inflict_protect', 'B'),
+        ('equip_chars', 'B'),
+        count=NUM_ITEMS,
+    )
+    STATS_LAYOUT = utils.RecordLayout(
+        ('elemental_immunities', 'B'),
+        ('elemental_resistances', 'B'),
+        ('status_immunities', 'B'),
+        ('status_buffs', 'B'),
+        ('speed', 'B'),
+        ('attack', 'B'),
+        ('defense', 'B'),
+        ('magic_attack', 'B'),
+        ('magic_defense', 'B'),
+        ('variance', 'B'),
+        count=NUM_ITEMS,
+    )
+    PRICE_LAYOUT = utils.RecordLayout(
+        ('price', 'H'),
+        count=NUM_ITEMS,
+    )
+
     # Stats used during equipment randomization.
     EQUIP_STATS = ["speed", "attack", "defense", "magic_attack", "magic_defense"]
 
@@ -71,6 +96,8 @@ class Item:
     # a small handful of consumable items have their effects shuffled as well.
     include_stats_in_patch = False
 
+    world = utils.WeakAttribute()
+
     def __init__(self, world):
         """
 
@@ -222,6 +249,11 @@ class Item:
         self._rank += self.index / 1000.0
         return self._rank
 
+    @property
+    def random_rank(self):
+        """:rtype: bool"""
+        return self.price == 0 and not self.is_key
+
     def get_similar(self, candidates):
         """Get a random similar item from a list of potential candidates for this one.
 
@@ -234,9 +266,15 @@ class Item:
         elif self not in candidates:
             return self
 
-        # Sort by rank and mutate our position within the list to get a replacement item.
-        candidates = sorted(candidates, key=lambda c: c.rank)
-        index = candidates.index(self)
+        # Sort by rank and mutate our position within the list to get a replacement item.  Random ranks are re-rolled
+        # on every check, so only use the cached ordering when there aren't any.
+        order = self.world.registry.item_rank_order(candidates)
+        if order is None:
+            candidates = sorted(candidates, key=lambda c: c.rank)
+            index = candidates.index(self)
+        else:
+            candidates, positions = order
+            index = positions[self]
         index = utils.mutate_normal(index, maximum=len(candidates) - 1)
         return candidates[index]
 
@@ -318,6 +356,7 @@ class Item:
         :rtype: randomizer.logic.patch.Patch
         """
         patch = Patch()
+        tables = self.world.patch_tables
         base_addr = self.BASE_ADDRESS + (self.index * 18)
 
         # For non-shop items with no price (key items), there is no randomization.
@@ -326,46 +365,42 @@ class Item:
 
         # Only modify equipment properties.
         if self.is_equipment or self.include_stats_in_patch:
-            data = bytearray()
-
             # Only include initial item type and inflict/protect flags for equipment.
             if self.is_equipment:
                 # Item type and instant KO protection.
-                val = self.item_type
+                item_type = self.item_type
                 if self.prevent_ko:
-                    val |= 1 << 7
-                data += utils.ByteField(val).as_bytes()
+                    item_type |= 1 << 7
 
                 # Inflict/protect flags for status ailments/buffs.
-                val = 0
+                inflict_protect = 0
                 if self.status_immunities:
-                    val += 1 << 0
+                    inflict_protect += 1 << 0
                 if self.status_buffs:
-                    val += 1 << 1
-                data += utils.ByteField(val).as_bytes()
+                    inflict_protect += 1 << 1
 
                 # Which characters can equip
-                data += utils.BitMapSet(1, [c.index for c in self.equip_chars]).as_bytes()
-
-                patch.add_data(base_addr, data)
+                self.EQUIP_LAYOUT.add_record(patch, tables, self.index, base_addr, item_type, inflict_protect,
+                                             utils.bits(c.index for c in self.equip_chars))
 
             # Stats and special properties.
-            data = bytearray()
-            data += utils.BitMapSet(1, self.elemental_immunities).as_bytes()
-            data += utils.BitMapSet(1, self.elemental_resistances).as_bytes()
-            data += utils.BitMapSet(1, self.status_immunities).as_bytes()
-            data += utils.BitMapSet(1, self.status_buffs).as_bytes()
-            data += utils.ByteField(self.speed).as_bytes()
-            data += utils.ByteField(self.attack).as_bytes()
-            data += utils.ByteField(self.defense).as_bytes()
-            data += utils.ByteField(self.magic_attack).as_bytes()
-            data += utils.ByteField(self.magic_defense).as_bytes()
-            data += utils.ByteField(self.variance).as_bytes()
-            patch.add_data(base_addr + 5, data)
+            self.STATS_LAYOUT.add_record(
+                patch, tables, self.index, base_addr + 5,
+                utils.bits(self.elemental_immunities),
+                utils.bits(self.elemental_resistances),
+                utils.bits(self.status_immunities),
+                utils.bits(self.status_buffs),
+                self.speed,
+                self.attack,
+                self.defense,
+                self.magic_attack,
+                self.magic_defense,
+                self.variance,
+            )
 
         # Price
         price_addr = self.BASE_PRICE_ADDRESS + (self.index * 2)
-        patch.add_data(price_addr, utils.ByteField(self.price, num_bytes=2).as_bytes())
+        self.PRICE_LAYOUT.add_record(patch, tables, self.index, price_addr, self.price)
 
         return patch
 
@@ -2447,11 +2482,22 @@ class Shop:
     """Class representing a shop with a list of items."""
     BASE_ADDRESS = 0x3a44df
 
+    # Total number of shops in the data.
+    NUM_SHOPS = 25
+
+    # ROM record layout for patch data, after the shop flags byte.
+    ITEMS_LAYOUT = utils.RecordLayout(
+        *[('item_{}'.format(i), 'B') for i in range(15)],
+        count=NUM_SHOPS
+    )
+
     # Default per-shop attributes.
     index = 0
     frog_coin_shop = False
     items = []
 
+    world = utils.WeakAttribute()
+
     def __init__(self, world):
         """
 
@@ -2493,16 +2539,11 @@ class Shop:
         patch = Patch()
         base_addr = self.BASE_ADDRESS + (self.index * 16)
 
-        data = bytearray()
-        for item in self.items:
-            data += utils.ByteField(item.index).as_bytes()
-
         # Fill out extra shop fields with no item value.
-        while len(data) < 15:
-            data += utils.ByteField(255).as_bytes()
-
+        values = [item.index for item in self.items]
+        values += [255] * (15 - len(values))
         # First byte is shop flags, don't change those.  Put items one byte later.
-        patch.add_data(base_addr + 1, data)
+        self.ITEMS_LAYOUT.add_record(patch, self.world.patch_tables, self.index, base_addr + 1, *values)
 
         return patch
 
@@ -49,6 +49,8 @@ class ItemLocation:
     access = 0
     not_depletable = False
 
+    world = utils.WeakAttribute()
+
     def __init__(self, world):
         """
 
@@ -0,0 +1,263 @@
+# Indexed registry of the vanilla data classes, built once at import so generation does dictionary lookups instead of
+# scanning modules and lists for every seed.
+
+import collections
+import inspect
+
+from randomizer.logic import utils
+from . import locations
+from . import palettes
+
+
+def find_subclasses(module, clazz):
+    """Find all subclasses of a class defined in a module, in name order.
+
+    Args:
+        module: Module to search.
+        clazz (type): Base class.
+
+    Returns:
+        list[type]: Subclasses of the base class, not including the base class itself.
+
+    """
+    return [
+        cls
+        for name, cls in inspect.getmembers(module)
+        if inspect.isclass(cls) and issubclass(cls, clazz) and cls != clazz
+    ]
+
+
+# Palette choices for each character palette base class.
+PALETTES = dict((clazz, find_subclasses(palettes, clazz)) for clazz in (
+    palettes.MarioPalette,
+    palettes.MallowPalette,
+    palettes.GenoPalette,
+    palettes.BowserPalette,
+    palettes.ToadstoolPalette,
+))
+
+# Bowser's Keep door rooms.
+BOWSER_ROOMS = find_subclasses(locations, locations.BowserRoom)
+
+# Item placement eligibility for item classes (rather than world instances), keyed by location eligibility key and item
+# class.  Class checks only look at class attributes, so they are the same for every world.
+_CLASS_ELIGIBILITY = {}
+
+
+def _location_eligibility_key(location):
+    """
+    Args:
+        location (randomizer.data.locations.ItemLocation): Item location.
+
+    Returns:
+        tuple: Key shared by all locations whose item_allowed check gives the same answer for any item.
+    """
+    return type(location).item_allowed, location.missable, location.not_depletable
+
+
+class WorldRegistry:
+    """Per-world view of the registry indexes over the instances in a single game world."""
+
+    world = utils.WeakAttribute()
+
+    def __init__(self, world):
+        """
+
+        Args:
+            world (randomizer.logic.main.GameWorld):
+
+        """
+        self.world = world
+        self._characters_by_index = dict((c.index, c) for c in world.characters)
+        self._chests_by_area = None
+        self._consumables = None
+        self._location_eligibility = {}
+        self._shop_eligibility = {}
+        self._enemy_ranks = None
+        self._item_ranks = {}
+
+    def character(self, index):
+        """
+        Args:
+            index (int): Character index.
+
+        Returns:
+            randomizer.data.characters.Character: Character instance for this world.
+        """
+        return self._characters_by_index[index]
+
+    def item(self, index):
+        """
+        Args:
+            index (int): Item index.
+
+        Returns:
+            randomizer.data.items.Item: Item instance for this world, or None if no world item has this index.
+        """
+        return self.world.items_dict.get(index)
+
+    def chests_in_area(self, area):
+        """
+        Args:
+            area (randomizer.data.locations.Area): Area.
+
+        Returns:
+            list[randomizer.data.locations.ItemLocation]: Chest locations for this world in the area, in world order.
+        """
+        if self._chests_by_area is None:
+            self._chests_by_area = collections.defaultdict(list)
+            for chest in self.world.chest_locations:
+                self._chests_by_area[chest.area].append(chest)
+        return self._chests_by_area[area]
+
+    def invalidate_locations(self):
+        """Drop the cached location lookups.  Call this after the world's chest locations are rebuilt."""
+        self._chests_by_area = None
+
+    @property
+    def consumables(self):
+        """
+        Returns:
+            list[randomizer.data.items.Item]: Consumable non-reusable item instances for this world, in world order.
+        """
+        if self._consumables is None:
+            self._consumables = [i for i in self.world.items if i.consumable and not i.reuseable]
+        return self._consumables
+
+    def _instance_bit(self, item):
+        """
+        Args:
+            item (randomizer.data.items.Item|type): Item instance or class.
+
+        Returns:
+            int: Bit for this item in the eligibility bitsets, or 0 if it isn't one of this world's item instances.
+        """
+        if self.world.items_dict.get(item.index) is item:
+            return 1 << item.index
+        return 0
+
+    def invalidate_eligibility(self):
+        """Drop the cached eligibility bitsets.  Call this after changing item attributes the checks depend on, such as
+        prices or equip characters.
+        """
+        self._location_eligibility.clear()
+        self._shop_eligibility.clear()
+
+    def location_eligibility(self, location):
+        """
+        Args:
+            location (randomizer.data.locations.ItemLocation): Item location.
+
+        Returns:
+            int: Bitset by item index of this world's item instances allowed in the location.
+        """
+        key = _location_eligibility_key(location)
+        mask = self._location_eligibility.get(key)
+        if mask is None:
+            mask = 0
+            for item in self.world.items:
+                if location.item_allowed(item):
+                    mask |= 1 << item.index
+            self._location_eligibility[key] = mask
+        return mask
+
+    def shop_eligibility(self, shop):
+        """
+        Args:
+            shop (randomizer.data.items.Shop): Shop.
+
+        Returns:
+            int: Bitset by item index of this world's item instances allowed in the shop.
+        """
+        key = type(shop).is_item_allowed
+        mask = self._shop_eligibility.get(key)
+        if mask is None:
+            mask = 0
+            for item in self.world.items:
+                if shop.is_item_allowed(item):
+                    mask |= 1 << item.index
+            self._shop_eligibility[key] = mask
+        return mask
+
+    def item_allowed(self, location, item):
+        """Cached equivalent of location.item_allowed(item).
+
+        Args:
+            location (randomizer.data.locations.ItemLocation): Item location.
+            item (randomizer.data.items.Item|type): Item instance or class.
+
+        Returns:
+            bool: True if the given item is allowed to be placed in the location, False otherwise.
+        """
+        bit = self._instance_bit(item)
+        if bit:
+            return bool(self.location_eligibility(location) & bit)
+
+        key = (_location_eligibility_key(location), item)
+        allowed = _CLASS_ELIGIBILITY.get(key)
+        if allowed is None:
+            allowed = location.item_allowed(item)
+            if isinstance(item, type):
+                _CLASS_ELIGIBILITY[key] = allowed
+        return allowed
+
+    def allowed_items(self, location, candidates):
+        """
+        Args:
+            location (randomizer.data.locations.ItemLocation): Item location.
+            candidates (list[randomizer.data.items.Item|type]): Items to filter.
+
+        Returns:
+            list[randomizer.data.items.Item|type]: Candidates allowed in the location, in the same order.
+        """
+        return [i for i in candidates if self.item_allowed(location, i)]
+
+    def shop_items(self, shop, candidates):
+        """
+        Args:
+            shop (randomizer.data.items.Shop): Shop.
+            candidates (list[randomizer.data.items.Item]): This world's item instances to filter.
+
+        Returns:
+            list[randomizer.data.items.Item]: Candidates allowed in the shop, in the same order.
+        """
+        mask = self.shop_eligibility(shop)
+        return [i for i in candidates if (mask >> i.index) & 1]
+
+    def invalidate_ranks(self):
+        """Drop the cached rank orderings.  Call this after changing stats that enemy or item ranks are based on."""
+        self._enemy_ranks = None
+        self._item_ranks.clear()
+
+    def enemy_rank_order(self):
+        """
+        Returns:
+            tuple[list[randomizer.data.enemies.Enemy], dict]: Non-boss enemy instances for this world sorted by rank
+                and index, and a dict of each enemy's position in that list.
+        """
+        if self._enemy_ranks is None:
+            ordered = sorted((e for e in self.world.enemies if not e.boss), key=lambda e: (e.rank, e.index))
+            self._enemy_ranks = ordered, dict((e, i) for i, e in enumerate(ordered))
+        return self._enemy_ranks
+
+    def item_rank_order(self, candidates):
+        """
+        Args:
+            candidates (list[randomizer.data.items.Item]): Candidate items.  The ordering is cached for this list
+                object, so it shouldn't be changed while the cache is valid.
+
+        Returns:
+            tuple[list[randomizer.data.items.Item], dict]: Candidates sorted by rank, and a dict of each candidate's
+                position in that list.  None if any candidate's rank is random, since those are re-rolled every time.
+        """
+        key = id(candidates)
+        cached = self._item_ranks.get(key)
+        if cached is None or cached[0] is not candidates:
+            if any(c.random_rank for c in candidates):
+                order = None
+            else:
+                ordered = sorted(candidates, key=lambda c: c.rank)
+                order = ordered, dict((c, i) for i, c in enumerate(ordered))
+            cached = candidates, order
+            self._item_ranks[key] = cached
+        return cached[1]
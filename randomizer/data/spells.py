@@ -10,6 +10,24 @@ class Spell:
     """Class representing a magic spell to be randomized."""
     BASE_ADDRESS = 0x3a20f1
 
+    # Total number of spells in the data.
+    NUM_SPELLS = 256
+
+    # ROM record layouts for patch data.
+    FP_LAYOUT = utils.RecordLayout(
+        ('fp', 'B'),
+        count=NUM_SPELLS,
+    )
+    POWER_LAYOUT = utils.RecordLayout(
+        ('power', 'B'),
+        ('hit_rate', 'B'),
+        count=NUM_SPELLS,
+    )
+    STATUS_LAYOUT = utils.RecordLayout(
+        ('status_effects', 'B'),
+        count=NUM_SPELLS,
+    )
+
     # Default per-spell attributes.
     index = 0
     fp = 0
@@ -17,6 +35,8 @@ class Spell:
     hit_rate = 0
     instant_ko = False
 
+    world = utils.WeakAttribute()
+
     def __init__(self, world):
         """
 
@@ -46,10 +66,9 @@ class Spell:
 
         # FP is byte 3, power is byte 6, hit rate is byte 7.  Each spell is 12 bytes.
         base_addr = self.BASE_ADDRESS + (self.index * 12)
-        patch.add_data(base_addr + 2, utils.ByteField(self.fp).as_bytes())
-        data = utils.ByteField(self.power).as_bytes()
-        data += utils.ByteField(self.hit_rate).as_bytes()
-        patch.add_data(base_addr + 5, data)
+        tables = self.world.patch_tables
+        self.FP_LAYOUT.add_record(patch, tables, self.index, base_addr + 2, self.fp)
+        self.POWER_LAYOUT.add_record(patch, tables, self.index, base_addr + 5, self.power, self.hit_rate)
 
         return patch
 
@@ -74,8 +93,8 @@ class EnemySpell(Spell):
 
         # Add status effects for enemy attacks, if any.
         base_addr = self.BASE_ADDRESS + (self.index * 12)
-        data = utils.BitMapSet(1, self.status_effects).as_bytes()
-        patch.add_data(base_addr + 7, data)
+        self.STATUS_LAYOUT.add_record(patch, self.world.patch_tables, self.index, base_addr + 7,
+                                      utils.bits(self.status_effects))
 
         return patch
 
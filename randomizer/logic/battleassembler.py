@@ -1,3 +1,5 @@
+import collections.abc
+
 from . import utils
 from .dialogs import allocate_string
 from .patch import Patch
@@ -9,6 +11,10 @@ from randomizer.data.spells import Spell, CharacterSpell, EnemySpell
 
 mem_base = 0x7EE000
 
+# Assembled bytes of the vanilla scripts by enemy index.  Most enemies keep their vanilla script untouched, so these are
+# only assembled once per process.
+_vanilla_script_bytes = {}
+
 def lower(*args):
     return [getattr(arg, 'index', arg) for arg in args]
 
@@ -207,6 +213,53 @@ def type_assert(t, *args):
         elif arg and not issubclass(arg, t):
             raise Exception('arg %s is not of type %s'%(arg, t))
 
+class CopyOnWriteScript(collections.abc.MutableSequence):
+    """Battle script instruction list that reads from a shared vanilla script, and only makes a private copy the first
+    time it's changed.  The shared script is never modified.
+    """
+
+    def __init__(self, shared):
+        """
+
+        Args:
+            shared (list[tuple]): Shared vanilla script instructions as (name, args) tuples.
+
+        """
+        self._shared = shared
+        self._own = None
+
+    @property
+    def modified(self):
+        """
+        Returns:
+            bool: True if this script has been changed from the shared script, False otherwise.
+        """
+        return self._own is not None
+
+    def _materialize(self):
+        if self._own is None:
+            self._own = list(self._shared)
+        return self._own
+
+    def __getitem__(self, index):
+        return (self._shared if self._own is None else self._own)[index]
+
+    def __setitem__(self, index, value):
+        self._materialize()[index] = value
+
+    def __delitem__(self, index):
+        del self._materialize()[index]
+
+    def __len__(self):
+        return len(self._shared if self._own is None else self._own)
+
+    def __iter__(self):
+        return iter(self._shared if self._own is None else self._own)
+
+    def insert(self, index, value):
+        self._materialize().insert(index, value)
+
+
 class BattleScript:
     def __init__(self):
         self.counter_called = False
@@ -377,7 +430,14 @@ def assemble_battle_scripts(world):
             # This makes round tripping possible
             # Might be worth it to remove them and save on space...
             script = battlescripts.scripts[index]
-        script_bytes = BattleScriptAssember.assemble_from_tuples(script)
+
+        if script is battlescripts.scripts[index] or (isinstance(script, CopyOnWriteScript) and not script.modified):
+            script_bytes = _vanilla_script_bytes.get(index)
+            if script_bytes is None:
+                script_bytes = bytes(BattleScriptAssember.assemble_from_tuples(battlescripts.scripts[index]))
+                _vanilla_script_bytes[index] = script_bytes
+        else:
+            script_bytes = BattleScriptAssember.assemble_from_tuples(script)
         script_base = allocate_string(len(script_bytes), free_list)
         offset = index * 2
         script_short = script_base & 0xFFFF
@@ -2,9 +2,8 @@
 
 import collections
 import random
-import inspect
 
-from randomizer.data import characters, spells, palettes
+from randomizer.data import characters, spells, palettes, registry
 from randomizer.logic import flags, utils
 
 
@@ -345,17 +344,11 @@ def randomize_all(world):
     :type world: randomizer.logic.main.GameWorld
     """
     # Palettes!!!!
-    def find_subclasses(module, clazz):
-        return [
-            cls
-            for name, cls in inspect.getmembers(module)
-            if inspect.isclass(cls) and issubclass(cls, clazz) and cls != clazz
-        ]
-    mario_palettes = find_subclasses(palettes, palettes.MarioPalette)
-    mallow_palettes = find_subclasses(palettes, palettes.MallowPalette)
-    geno_palettes = find_subclasses(palettes, palettes.GenoPalette)
-    bowser_palettes = find_subclasses(palettes, palettes.BowserPalette)
-    toadstool_palettes = find_subclasses(palettes, palettes.ToadstoolPalette)
+    mario_palettes = registry.PALETTES[palettes.MarioPalette]
+    mallow_palettes = registry.PALETTES[palettes.MallowPalette]
+    geno_palettes = registry.PALETTES[palettes.GenoPalette]
+    bowser_palettes = registry.PALETTES[palettes.BowserPalette]
+    toadstool_palettes = registry.PALETTES[palettes.ToadstoolPalette]
 
     if world.settings.is_flag_enabled(flags.PaletteSwaps):
         world.characters[0].palette = random.choice(mario_palettes)
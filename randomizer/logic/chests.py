@@ -16,13 +16,14 @@ def _intershuffle_chests(chest_locations):
         chest_locations(list[randomizer.data.chests.Chest]):
 
     """
+    allowed = chest_locations[0].world.registry.item_allowed
     chests_to_shuffle = chest_locations[:]
     random.shuffle(chests_to_shuffle)
 
     for chest in chests_to_shuffle:
         # Get other chests in this group that are able to swap items and pick one.
-        options = [swap for swap in chest_locations if swap != chest and chest.item_allowed(swap.item) and
-                   swap.item_allowed(chest.item)]
+        options = [swap for swap in chest_locations if swap != chest and allowed(chest, swap.item) and
+                   allowed(swap, chest.item)]
         if options:
             swap = random.choice(options)
             chest.item, swap.item = swap.item, chest.item
@@ -51,6 +52,7 @@ def randomize_all(world):
     frogcoins_allowed = not world.settings.is_flag_enabled(flags.ChestExcludeFrogCoins)
     mushrooms_allowed = not world.settings.is_flag_enabled(flags.ChestExcludeMushrooms)
     stars_allowed = not world.settings.is_flag_enabled(flags.ChestExcludeStars)
+    allowed = world.registry.item_allowed
 
     biased = world.settings.is_flag_enabled(flags.ChestShuffleBiased)
     include_key_items = world.settings.is_flag_enabled(flags.ChestIncludeKeyItems)
@@ -81,23 +83,20 @@ def randomize_all(world):
         # Same area shuffle.
         if world.settings.is_flag_enabled(flags.ChestShuffle1):
             for area in locations.Area:
-                group = [chest for chest in world.chest_locations if chest.area == area]
+                group = world.registry.chests_in_area(area)[:]
                 if group:
                     _intershuffle_chests(group)
             for chest in world.chest_locations:
-                tiered_item = None
-                for i in world.items:
-                    if chest.item.index == i.index:
-                        tiered_item = i
+                tiered_item = world.registry.item(chest.item.index)
                 if ((chest.item in coins and not coins_allowed) or (chest.item in stars and not stars_allowed) or
                         (chest.item == items.Flower and not flowers_allowed) or
                         (chest.item == items.RecoveryMushroom and not mushrooms_allowed) or
                         (chest.item == items.FrogCoin and not frogcoins_allowed) or
                         (tiered_item and tiered_item.hard_tier > tiers_allowed)):
                     # Put "You Missed!" empty item if allowed, otherwise just put some coins if this spot is empty.
-                    if chest.item_allowed(items.YouMissed):
+                    if allowed(chest, items.YouMissed):
                         chest.item = items.YouMissed
-                    elif chest.item_allowed(items.Mushroom):
+                    elif allowed(chest, items.Mushroom):
                         chest.item = items.Mushroom
             if forceCoinsInBanditsWay:
                 forced_coins = [chest for chest in world.chest_locations if isinstance(chest, chests.BanditsWayCroco)]
@@ -106,7 +105,7 @@ def randomize_all(world):
         # Empty chests.
         elif world.settings.is_flag_enabled(flags.ChestShuffleEmpty):
             for chest in world.chest_locations:
-                if chest.item_allowed(items.YouMissed):
+                if allowed(chest, items.YouMissed):
                     chest.item = items.YouMissed
 
         elif (world.settings.is_flag_enabled(flags.ChestShuffleBiased) or
@@ -153,7 +152,7 @@ def randomize_all(world):
             if stars_allowed:
                 if world.settings.is_flag_enabled(flags.ChestRandomizeStars):
                     eligible_chests = [chest for chest in world.chest_locations if
-                                       chest.item_allowed(items.BanditsWayStar)]
+                                       allowed(chest, items.BanditsWayStar)]
                     # randomize how many stars there will be - usually close to vanilla #
                     num_stars = utils.mutate_normal(min(
                         len(eligible_chests), math.floor(ratio_stars / denominator * total_chests)),
@@ -381,7 +380,7 @@ def randomize_all(world):
 
             # Then make sure "You Missed" is found in exactly 1 chest
             eligible_empty_locations = [chest for chest in chests_plus_leftovers if chest not in finished_chests and
-                                        not isinstance(chest, chests.Reward) and chest.item_allowed(items.YouMissed)]
+                                        not isinstance(chest, chests.Reward) and allowed(chest, items.YouMissed)]
             chest = random.choice(eligible_empty_locations)
             chest.item = items.YouMissed
             finished_chests.append(chest)
@@ -397,28 +396,29 @@ def randomize_all(world):
                               i.hard_tier <= tiers_allowed]
 
             while len(eligible_chests) > 0:
+                world.deadline.check()
                 chest = random.choice(eligible_chests)
-                items_for_chest = [i for i in eligible_items if chest.item_allowed(i)]
+                items_for_chest = world.registry.allowed_items(chest, eligible_items)
 
                 if biased:
                     selected_tier = get_eligible_tier(chest.access)
                     adjusted_denominator = ratio_items
-                    if coins_allowed and chest.item_allowed(items.Coins150):
+                    if coins_allowed and allowed(chest, items.Coins150):
                         adjusted_ratio_coins = ratio_coins
                     else:
                         adjusted_ratio_coins = 0
 
-                    if flowers_allowed and chest.item_allowed(items.Flower):
+                    if flowers_allowed and allowed(chest, items.Flower):
                         adjusted_ratio_flowers = math.floor(ratio_flowers / 1.5 / selected_tier)
                     else:
                         adjusted_ratio_flowers = 0
 
-                    if mushrooms_allowed and chest.item_allowed(items.RecoveryMushroom):
+                    if mushrooms_allowed and allowed(chest, items.RecoveryMushroom):
                         adjusted_ratio_mushrooms = math.floor(ratio_mushrooms / 1.5 / selected_tier)
                     else:
                         adjusted_ratio_mushrooms = 0
 
-                    if frogcoins_allowed and chest.item_allowed(items.FrogCoin):
+                    if frogcoins_allowed and allowed(chest, items.FrogCoin):
                         adjusted_ratio_frogcoins = math.floor(ratio_frogcoins / 1.5 / selected_tier)
                     else:
                         adjusted_ratio_frogcoins = 0
@@ -426,15 +426,15 @@ def randomize_all(world):
                     adjusted_denominator += (adjusted_ratio_coins + adjusted_ratio_flowers + adjusted_ratio_mushrooms +
                                              adjusted_ratio_frogcoins)
                     selection = random.randint(1, adjusted_denominator)
-                    if flowers_allowed and chest.item_allowed(items.Flower) and selection < adjusted_ratio_flowers:
+                    if flowers_allowed and allowed(chest, items.Flower) and selection < adjusted_ratio_flowers:
                         chest.item = items.Flower
-                    elif (mushrooms_allowed and chest.item_allowed(items.RecoveryMushroom) and
+                    elif (mushrooms_allowed and allowed(chest, items.RecoveryMushroom) and
                           selection < adjusted_ratio_flowers + adjusted_ratio_mushrooms):
                         chest.item = items.RecoveryMushroom
-                    elif (frogcoins_allowed and chest.item_allowed(items.FrogCoin) and
+                    elif (frogcoins_allowed and allowed(chest, items.FrogCoin) and
                           selection < adjusted_ratio_flowers + adjusted_ratio_mushrooms + adjusted_ratio_frogcoins):
                         chest.item = items.FrogCoin
-                    elif (coins_allowed and selected_tier <= 2 and chest.item_allowed(items.Coins150) and
+                    elif (coins_allowed and selected_tier <= 2 and allowed(chest, items.Coins150) and
                           selection < adjusted_ratio_flowers + adjusted_ratio_mushrooms + adjusted_ratio_frogcoins +
                           adjusted_ratio_coins):
                         chest.item = random.choice([i for i in coins if i.hard_tier == selected_tier])
@@ -445,7 +445,7 @@ def randomize_all(world):
                             # If no possible items are allowed in this chest, make it coins instead.
                             possible_items = [i for i in items_for_chest if i.hard_tier == selected_tier]
                             if not possible_items:
-                                possible_items = [i for i in leftovers if chest.item_allowed(i)]
+                                possible_items = world.registry.allowed_items(chest, leftovers)
                             check_item = random.choice(possible_items)
                             if check_item.is_equipment:
                                 fifty = random.choice([0, 1])
@@ -457,15 +457,15 @@ def randomize_all(world):
                                 proceed_repeat_item = True
                 else:
                     selection = random.randint(1, denominator)
-                    if flowers_allowed and chest.item_allowed(items.Flower) and selection < ratio_flowers / 1.5:
+                    if flowers_allowed and allowed(chest, items.Flower) and selection < ratio_flowers / 1.5:
                         chest.item = items.Flower
-                    elif (mushrooms_allowed and chest.item_allowed(items.RecoveryMushroom) and
+                    elif (mushrooms_allowed and allowed(chest, items.RecoveryMushroom) and
                           selection < ratio_flowers / 1.5 + ratio_mushrooms / 1.5):
                         chest.item = items.RecoveryMushroom
-                    elif (frogcoins_allowed and chest.item_allowed(items.FrogCoin) and
+                    elif (frogcoins_allowed and allowed(chest, items.FrogCoin) and
                           selection < ratio_flowers / 1.5 + ratio_mushrooms / 1.5 + ratio_frogcoins / 1.5):
                         chest.item = items.FrogCoin
-                    elif (coins_allowed and chest.item_allowed(items.Coins150) and
+                    elif (coins_allowed and allowed(chest, items.Coins150) and
                           selection < ratio_flowers / 1.5 + ratio_mushrooms / 1.5 + ratio_frogcoins / 1.5 +
                           ratio_coins):
                         chest.item = random.choice(coins)
@@ -499,7 +499,7 @@ def randomize_all(world):
 
                             # If no possible items are allowed in this chest, make it coins instead.
                             if not possible_items:
-                                possible_items = [i for i in leftovers if chest.item_allowed(i)]
+                                possible_items = world.registry.allowed_items(chest, leftovers)
                             check_item = random.choice(possible_items)
 
                             # 50% chance of rerolling if item is an equip
@@ -522,8 +522,9 @@ def randomize_all(world):
 
             if eligible_rewards:
                 while len(eligible_rewards) > 0:
+                    world.deadline.check()
                     chest = random.choice(eligible_rewards)
-                    items_for_chest = [i for i in eligible_items if chest.item_allowed(i)]
+                    items_for_chest = world.registry.allowed_items(chest, eligible_items)
 
                     # For Cricket Jam reward, always give frog coins for now!  Just randomize the number.
                     if isinstance(chest, chests.CricketJamReward):
@@ -563,7 +564,7 @@ def randomize_all(world):
 
                             # If no possible items are allowed in this chest, make it coins instead.
                             if not possible_items:
-                                possible_items = [i for i in leftovers if chest.item_allowed(i)]
+                                possible_items = world.registry.allowed_items(chest, leftovers)
                             check_item = random.choice(possible_items)
 
                             if check_item not in items_already_in_chests or not check_item.is_equipment:
@@ -607,7 +608,7 @@ def randomize_all(world):
 
             for chest in [i for i in world.chest_locations if not isinstance(i, chests.Reward)]:
                 if chest.item.hard_tier == 1 and not chest.item.is_key and chest.item.price > 0:
-                    if chest.item_allowed(items.Coins150) and not chest.item.frog_coin_item:
+                    if allowed(chest, items.Coins150) and not chest.item.frog_coin_item:
                         chest.item = closest_coins(chest.item.price)
-                    elif chest.item_allowed(items.FrogCoin) and chest.item.frog_coin_item:
+                    elif allowed(chest, items.FrogCoin) and chest.item.frog_coin_item:
                         chest.item = items.FrogCoin
@@ -0,0 +1,102 @@
+# Cooperative generation deadline so slow flag combinations can't run past the worker timeout.
+
+import sys
+import time
+
+
+class GenerationTimeout(Exception):
+    """Raised when a seed takes longer to generate than its deadline allows."""
+
+    def __init__(self, phase, elapsed, limit):
+        """
+
+        Args:
+            phase (str): Name of the generation phase that was running when the deadline expired.
+            elapsed (float): Seconds elapsed since the deadline started.
+            limit (float): Deadline limit in seconds.
+
+        """
+        super().__init__("Generation took longer than {:g} seconds during {}".format(limit, phase))
+        self.phase = phase
+        self.elapsed = elapsed
+        self.limit = limit
+
+    def as_dict(self):
+        """
+        Returns:
+            dict: Structured error data for JSON responses and logs.
+        """
+        return {
+            'error': self.args[0],
+            'phase': self.phase,
+            'elapsed': round(self.elapsed, 3),
+            'limit': self.limit,
+        }
+
+
+class Deadline:
+    """Deadline that long-running loops check cooperatively.  The current phase is tracked so that an expired deadline
+    reports which part of generation ran over, and the wall time and net allocated memory blocks of each phase are
+    recorded for metrics.
+    """
+
+    def __init__(self, limit=None):
+        """
+
+        Args:
+            limit (float): Seconds allowed from now, or None for no limit.
+
+        """
+        self.limit = limit
+        self.phase = 'init'
+        self._start = time.monotonic()
+        self._expires = self._start + limit if limit else None
+        self._timings = {}
+        self._phase_start = time.perf_counter()
+        self._phase_blocks = sys.getallocatedblocks()
+
+    @property
+    def elapsed(self):
+        """
+        Returns:
+            float: Seconds elapsed since the deadline started.
+        """
+        return time.monotonic() - self._start
+
+    def enter(self, phase):
+        """Mark the start of a new phase, checking the deadline first.
+
+        Args:
+            phase (str): Name of the phase being entered.
+
+        """
+        self.check()
+        self._record_phase()
+        self.phase = phase
+
+    def _record_phase(self):
+        now = time.perf_counter()
+        blocks = sys.getallocatedblocks()
+        timing = self._timings.setdefault(self.phase, [0.0, 0])
+        timing[0] += now - self._phase_start
+        timing[1] += blocks - self._phase_blocks
+        self._phase_start = now
+        self._phase_blocks = blocks
+
+    def finish(self):
+        """Mark the end of generation, closing the current phase.
+
+        Returns:
+            list[tuple[str, float, int]]: (phase, seconds, net allocated memory blocks) for each phase in the order
+                they were first entered.  Phases entered more than once are combined.
+
+        """
+        self._record_phase()
+        self.phase = 'done'
+        return [(phase, seconds, blocks) for phase, (seconds, blocks) in self._timings.items()]
+
+    def check(self):
+        """Raise GenerationTimeout if the deadline has expired."""
+        if self._expires is not None and time.monotonic() > self._expires:
+            raise GenerationTimeout(self.phase, self.elapsed, self.limit)
+
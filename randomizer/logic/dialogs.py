@@ -86,8 +86,11 @@ def randomize_quiz(world):
         0x22e082: 3953,  # Existing Questions
     }
     for dialog_id, question in zip(dialogs.quiz_dialogs, random_questions):
-        # Randomize order of incorrect answers for some extra variety.
-        random.shuffle(question.wrong_answers)
+        # Randomize order of incorrect answers for some extra variety.  Backfill questions are shared by every world, so
+        # shuffle a copy of the answers instead of the question's own list.
+        wrong_answers = question.wrong_answers[:]
+        random.shuffle(wrong_answers)
+        question = dialogs.Question(question.question, question.correct_answer, *wrong_answers)
 
         # Double check these
         if 1842 <= dialog_id < 1858:
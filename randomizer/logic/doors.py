@@ -1,6 +1,5 @@
 # Logic module for Bowser Door randomization.
 
-import inspect
 import random
 
 from randomizer import data
@@ -21,14 +20,7 @@ def patch_bowser_doors(world):
     patch = Patch()
 
     if world.settings.is_flag_enabled(flags.ShuffleBowsersKeep):
-        def find_subclasses(module, clazz):
-            return [
-                cls
-                for name, cls in inspect.getmembers(module)
-                if inspect.isclass(cls) and issubclass(cls, clazz) and cls != clazz
-            ]
-
-        all_rooms = find_subclasses(data.locations, data.locations.BowserRoom)
+        all_rooms = data.registry.BOWSER_ROOMS
         doors = [[], [], [], [], [], []]
         assigned_rooms = []
 
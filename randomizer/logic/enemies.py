@@ -1,12 +1,19 @@
 # enemy randomization logic.
 
+import array
+import math
 import random
-from functools import reduce
 
 from randomizer.data import bosses, enemies
-from randomizer.data.formations import FormationMember
+from randomizer.data.formations import EnemyFormation, FormationMember
 from . import flags, utils
 
+# Valid formation coordinates and the distance between every pair of them, flattened by row, so placing enemies only
+# needs table lookups.  Distances are computed exactly as before so placement choices don't change.
+COORDINATES = EnemyFormation.VALID_COORDINATES
+COORDINATE_DISTANCES = array.array('d', [((x1 - x2) ** 2 + (y1 - y2) ** 2) ** 0.5
+                                         for x1, y1 in COORDINATES for x2, y2 in COORDINATES])
+
 
 def _randomize_enemy_attack(attack):
     """Randomize a single enemy attack.
@@ -41,7 +48,8 @@ def _randomize_enemy_attack(attack):
         if attack.buffs and random.randint(1, 2) == 2:
             unused = list({3, 4, 5, 6} - set(attack.buffs))
             if unused:
-                attack.buffs.append(random.choice(unused))
+                # Buffs are a list on the attack class, so build a new one rather than changing it for every world.
+                attack.buffs = attack.buffs + [random.choice(unused)]
 
     # If there are status effects, randomize them.
     if attack.status_effects:
@@ -61,11 +69,43 @@ def _randomize_enemy_attack(attack):
     attack.hit_rate = utils.mutate_normal(attack.hit_rate, minimum=1, maximum=max_hit_rate)
 
 
-def _randomize_enemy(enemy):
+# Main enemy stats with their (minimum, maximum) mutation ranges, for batch stat mutation.
+BATCH_STATS = (
+    ("hp", 1, 32000),
+    ("speed", 0, 0xff),
+    ("attack", 1, 0xff),
+    ("defense", 1, 0xff),
+    ("magic_attack", 1, 0xff),
+    ("magic_defense", 1, 0xff),
+    ("fp", 1, 0xff),
+    ("evade", 0, 100),
+    ("magic_evade", 0, 100),
+)
+
+
+def _batch_mutate(world, stats):
+    """Mutate stat columns for all enemies at once with the world's batch mutator.
+
+    Args:
+        world (randomizer.logic.main.GameWorld):
+        stats (tuple[tuple[str, int, int]]): Stat attributes with their (minimum, maximum) ranges.
+
+    Returns:
+        list[dict]: Mutated stat values for each enemy, in world order.
+    """
+    mutated = {}
+    for attr, minimum, maximum in stats:
+        values = [getattr(enemy, attr) for enemy in world.enemies]
+        mutated[attr] = world.batch_mutator.mutate_normal(values, minimum, maximum)
+    return [dict((attr, values[i]) for attr, values in mutated.items()) for i in range(len(world.enemies))]
+
+
+def _randomize_enemy(enemy, mutated=None):
     """Randomize stats for this enemy.
 
     Args:
         enemy(randomizer.data.enemies.Enemy):
+        mutated(dict): Main stats already mutated by the batch mutator, or None to mutate them here.
     """
     # Randomize main stats.  For bosses, don't let the stats go below their vanilla values.
     mutate_attributes = (
@@ -83,15 +123,19 @@ def _randomize_enemy(enemy):
     for key in mutate_attributes:
         old_stats[key] = getattr(enemy, key)
 
-    enemy.hp = utils.mutate_normal(enemy.hp, minimum=1, maximum=32000)
-    enemy.speed = utils.mutate_normal(enemy.speed)
-    enemy.attack = utils.mutate_normal(enemy.attack, minimum=1)
-    enemy.defense = utils.mutate_normal(enemy.defense, minimum=1)
-    enemy.magic_attack = utils.mutate_normal(enemy.magic_attack, minimum=1)
-    enemy.magic_defense = utils.mutate_normal(enemy.magic_defense, minimum=1)
-    enemy.fp = utils.mutate_normal(enemy.fp, minimum=1)
-    enemy.evade = utils.mutate_normal(enemy.evade, minimum=0, maximum=100)
-    enemy.magic_evade = utils.mutate_normal(enemy.magic_evade, minimum=0, maximum=100)
+    if mutated is None:
+        enemy.hp = utils.mutate_normal(enemy.hp, minimum=1, maximum=32000)
+        enemy.speed = utils.mutate_normal(enemy.speed)
+        enemy.attack = utils.mutate_normal(enemy.attack, minimum=1)
+        enemy.defense = utils.mutate_normal(enemy.defense, minimum=1)
+        enemy.magic_attack = utils.mutate_normal(enemy.magic_attack, minimum=1)
+        enemy.magic_defense = utils.mutate_normal(enemy.magic_defense, minimum=1)
+        enemy.fp = utils.mutate_normal(enemy.fp, minimum=1)
+        enemy.evade = utils.mutate_normal(enemy.evade, minimum=0, maximum=100)
+        enemy.magic_evade = utils.mutate_normal(enemy.magic_evade, minimum=0, maximum=100)
+    else:
+        for key in mutate_attributes:
+            setattr(enemy, key, mutated[key])
 
     if enemy.boss:
         for attr, old_val in old_stats.items():
@@ -147,16 +191,10 @@ def _randomize_enemy(enemy):
 def _randomize_formation(formation):
     """Randomize this enemy formation."""
 
-    def get_distance(x1, y1, x2, y2):
-        return ((x1 - x2) ** 2 + (y1 - y2) ** 2) ** 0.5
-
-    def get_collective_distance(x1, y1, points):
-        distances = [get_distance(x1, y1, x2, y2) for x2, y2 in points]
-        return reduce(lambda a, b: a * b, distances, 1)
-
     def select_most_distance(possible_points, points):
-        chosen = max(possible_points, key=lambda c: get_collective_distance(c[0], c[1], points))
-        return chosen
+        # Product of the distances to every placed enemy, multiplied in placement order.
+        n = len(COORDINATES)
+        return max(possible_points, key=lambda c: math.prod([COORDINATE_DISTANCES[c * n + p] for p in points]))
 
     # Max enemies for a given group.
     max_enemies = 6
@@ -199,16 +237,20 @@ def _randomize_formation(formation):
 
     random.shuffle(chosen_enemies)
 
-    # Randomize coordinates for the chosen enemies.
+    # Randomize coordinates for the chosen enemies.  Sampling indexes into the coordinates uses the random stream exactly
+    # like sampling the coordinates themselves.
     formation.members = []
     done_coordinates = []
+    done_indexes = []
     for i, enemy in enumerate(chosen_enemies):
-        if not done_coordinates:
-            x, y = random.choice(formation.VALID_COORDINATES)
+        if not done_indexes:
+            c = random.choice(range(len(COORDINATES)))
         else:
-            candidates = random.sample(formation.VALID_COORDINATES, len(chosen_enemies) * 2)
-            x, y = select_most_distance(candidates, done_coordinates)
+            candidates = random.sample(range(len(COORDINATES)), len(chosen_enemies) * 2)
+            c = select_most_distance(candidates, done_indexes)
 
+        x, y = COORDINATES[c]
+        done_indexes.append(c)
         done_coordinates.append((x, y))
         formation.members.append(FormationMember(i, False, enemy, x, y))
 
@@ -284,9 +326,14 @@ def randomize_all(world):
         for chance, enemy in zip(morph_chances, valid):
             enemy.morph_chance = chance
 
-        # Finally shuffle enemy attribute values as normal.
-        for enemy in world.enemies:
-            _randomize_enemy(enemy)
+        # Finally shuffle enemy attribute values as normal.  The batch mutator does the main stats for every enemy at
+        # once up front.
+        if world.batch_mutator:
+            mutated = _batch_mutate(world, BATCH_STATS)
+        else:
+            mutated = [None] * len(world.enemies)
+        for enemy, enemy_mutated in zip(world.enemies, mutated):
+            _randomize_enemy(enemy, enemy_mutated)
 
         # Special logic for Smithy 2: All heads must have the same HP!  Use the base head enemy for this.
         main_head = world.get_enemy_instance(enemies.Smithy2Head)
@@ -294,14 +341,27 @@ def randomize_all(world):
             head = world.get_enemy_instance(e)
             head.hp = main_head.hp
 
+        # Enemy ranks are based on the stats shuffled above.
+        world.registry.invalidate_ranks()
+
     # Randomize individual rewards on their own.
     if world.settings.is_flag_enabled(flags.EnemyDrops):
-        for enemy in world.enemies:
-            enemy.coins = utils.mutate_normal(enemy.coins, maximum=255)
+        consumables = world.registry.consumables
+        if world.batch_mutator:
+            mutated = _batch_mutate(world, (("coins", 0, 255), ("xp", 1, 0xffff)))
+        else:
+            mutated = [None] * len(world.enemies)
 
-            # For bosses, don't let exp go above vanilla.  For normal enemies, don't let it go below.
+        for enemy, enemy_mutated in zip(world.enemies, mutated):
             oldxp = enemy.xp
-            enemy.xp = utils.mutate_normal(enemy.xp, minimum=1, maximum=0xffff)
+            if enemy_mutated is None:
+                enemy.coins = utils.mutate_normal(enemy.coins, maximum=255)
+                enemy.xp = utils.mutate_normal(enemy.xp, minimum=1, maximum=0xffff)
+            else:
+                enemy.coins = enemy_mutated["coins"]
+                enemy.xp = enemy_mutated["xp"]
+
+            # For bosses, don't let exp go above vanilla.  For normal enemies, don't let it go below.
             if enemy.boss:
                 enemy.xp = min(oldxp, enemy.xp)
             else:
@@ -309,7 +369,6 @@ def randomize_all(world):
 
             # Shuffle reward items with other consumable items.
             linked = enemy.normal_item == enemy.rare_item
-            consumables = [i for i in world.items if i.consumable and not i.reuseable]
 
             # Shuffle normal item, if this reward has one.
             if enemy.normal_item:
@@ -330,6 +389,7 @@ def randomize_all(world):
     # Shuffle enemy formations.
     if world.settings.is_flag_enabled(flags.EnemyFormations):
         for formation in world.enemy_formations:
+            world.deadline.check()
             _randomize_formation(formation)
 
     # XP boost.
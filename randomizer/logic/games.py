@@ -2,6 +2,7 @@
 
 import random
 
+from randomizer.data import games
 from . import flags
 
 
@@ -28,41 +29,55 @@ def _get_potential_ball_kicks(ball_solitaire):
     return potential_kicks
 
 
-def randomize_ball_solitaire(ball_solitaire):
-    """
+def enumerate_ball_solitaire_boards(ball_solitaire, min_balls=11):
+    """Find every finished board the reverse kick generation can produce with at least the given number of balls.
+    Generation starts from a single ball and reverse kicks until no more kicks are possible, so search all boards
+    reachable that way and keep the ones with no kicks left.
 
     Args:
-        ball_solitaire (randomizer.data.games.BallSolitaireGame):
+        ball_solitaire (randomizer.data.games.BallSolitaireGame): Game to use for the spot layout.
+        min_balls (int): Minimum number of balls for a board to be included.
 
-    """
-    while True:
-        # Clear all spots first.
-        for spot in ball_solitaire.spots:
-            spot.has_ball = False
-
-        # Pick a random spot to have the final ball.
-        random.choice(ball_solitaire.spots).has_ball = True
+    Returns:
+        list[int]: Sorted board bitmaps.
 
-        # Randomly pick an available direction to kick a ball until we can't do any more.
-        while True:
-            potential_kicks = []
-            spots_with_balls = [s for s in ball_solitaire.spots if s.has_ball]
+    """
+    to_visit = [1 << i for i in range(len(ball_solitaire.spots))]
+    seen = set(to_visit)
+    boards = []
+
+    while to_visit:
+        board = to_visit.pop()
+        ball_solitaire.board = board
+        potential_kicks = _get_potential_ball_kicks(ball_solitaire)
+
+        # Finished board, keep it if it has enough balls.
+        if not potential_kicks:
+            if ball_solitaire.num_balls >= min_balls:
+                boards.append(board)
+            continue
+
+        spot_indexes = [ball_solitaire.spots.index(spot) for spot, _ in potential_kicks]
+        for spot_index, (_, direction) in zip(spot_indexes, potential_kicks):
+            ball_solitaire.board = board
+            ball_solitaire.spots[spot_index].reverse_kick(direction)
+            next_board = ball_solitaire.board
+            if next_board not in seen:
+                seen.add(next_board)
+                to_visit.append(next_board)
+
+    boards.sort()
+    return boards
 
-            for spot in spots_with_balls:
-                for direction in ('up', 'down', 'left', 'right'):
-                    if spot.can_kick(direction, reverse=True):
-                        potential_kicks.append((spot, direction))
 
-            # Stop if we have no more potential kicks.
-            if not potential_kicks:
-                break
+def randomize_ball_solitaire(ball_solitaire):
+    """Pick a random board from the precomputed library of solvable boards.
 
-            spot, direction = random.choice(potential_kicks)
-            spot.reverse_kick(direction)
+    Args:
+        ball_solitaire (randomizer.data.games.BallSolitaireGame):
 
-        # TODO: This is a bad hack, but rarely we generate a low number of balls so just try again for now...
-        if ball_solitaire.num_balls > 10:
-            break
+    """
+    ball_solitaire.board = random.choice(games.get_solvable_boards())
 
 
 # ******** Magic buttons
@@ -249,6 +249,7 @@ def randomize_all(world):
 
     # Base Shuffle for equipment to set up for further shuffling
     for item in world.items:
+        world.deadline.check()
         if not item.is_equipment or not item.world.settings.is_flag_enabled(flags.EquipmentStats):
             continue
         if random.randint(1, 10) == 1:
@@ -487,6 +488,7 @@ def randomize_all(world):
                 if exclude is None:
                     exclude = []
                 valid_items = []
+                base = world.registry.shop_items(shop, base)
 
                 # Sb and Sv - obsolete
                 if (world.settings.is_flag_enabled(flags.ShopShuffleBalanced) and
@@ -496,7 +498,7 @@ def randomize_all(world):
                     if (shop.index in [0, 1, 2, 4, 5, 7, 17, 20, 21] or
                             (shop.index == 22 and world.settings.is_flag_enabled(flags.BowsersKeepOpen))):
                         valid_items = [i for i in base if i not in done_already and i.vanilla_shop and
-                                       i not in exclude and shop.is_item_allowed(i) and
+                                       i not in exclude and
                                        (((tiers_allowed == 1 or tiers_allowed == 2) and i.hard_tier == 1) or
                                         ((tiers_allowed == 3 or tiers_allowed == 4) and i.hard_tier <= 2))]
                         # In case the equip shuffle logic works out so that nothing belongs in a tiered shop,
@@ -508,7 +510,6 @@ def randomize_all(world):
                     elif (shop.index in [12, 13, 14, 15, 16, 18, 19, 23, 24] or
                           (shop.index == 22 and not world.settings.is_flag_enabled(flags.BowsersKeepOpen))):
                         valid_items = [i for i in base if i not in done_already and i.vanilla_shop and
-                                       shop.is_item_allowed(i) and
                                        ((3 >= tiers_allowed == i.hard_tier) or
                                         (tiers_allowed == 4 and 2 < i.hard_tier <= 4))]
                         # if not valid_items:
@@ -516,15 +517,15 @@ def randomize_all(world):
                         #                    i not in exclude and shop.is_item_allowed(i)]
                     # Missable shop
                     elif shop.index == 8:
-                        valid_items = [i for i in base if shop.is_item_allowed(i) and i.vanilla_shop and
+                        valid_items = [i for i in base if i.vanilla_shop and
                                        i not in exclude and i.hard_tier <= tiers_allowed and not i.reuseable]
                 # Sv only
                 elif world.settings.is_flag_enabled(flags.ShopShuffleVanilla):
                     if shop.index == 8:
-                        valid_items = [i for i in base if shop.is_item_allowed(i) and i.vanilla_shop and
+                        valid_items = [i for i in base if i.vanilla_shop and
                                        i not in exclude and i.hard_tier <= tiers_allowed and not i.reuseable]
                     else:
-                        valid_items = [i for i in base if i not in done_already and shop.is_item_allowed(i) and
+                        valid_items = [i for i in base if i not in done_already and
                                        i.vanilla_shop and i not in exclude and i.hard_tier <= tiers_allowed]
 
                 # Sb only
@@ -534,7 +535,6 @@ def randomize_all(world):
                     if (shop.index in [0, 1, 2, 4, 5, 7, 17, 20, 21] or
                             (shop.index == 22 and world.settings.is_flag_enabled(flags.BowsersKeepOpen))):
                         valid_items = [i for i in base if i not in done_already and i not in exclude and
-                                       shop.is_item_allowed(i) and
                                        (((tiers_allowed == 1 or tiers_allowed == 2) and i.hard_tier == 1) or
                                         ((tiers_allowed == 3 or tiers_allowed == 4) and i.hard_tier <= 2))]
                         # if not valid_items:
@@ -544,7 +544,6 @@ def randomize_all(world):
                     elif (shop.index in [12, 13, 14, 15, 16, 18, 19, 23, 24] or
                           (shop.index == 22 and not world.settings.is_flag_enabled(flags.BowsersKeepOpen))):
                         valid_items = [i for i in base if i not in done_already and i not in exclude and
-                                       shop.is_item_allowed(i) and
                                        ((3 >= tiers_allowed == i.hard_tier) or
                                         (tiers_allowed == 4 and 2 < i.hard_tier <= 4))]
                         # if not valid_items:
@@ -552,16 +551,16 @@ def randomize_all(world):
                         #                    i.vanilla_shop and shop.is_item_allowed(i)]
                     # Missable shop
                     elif shop.index == 8:
-                        valid_items = [i for i in base if shop.is_item_allowed(i) and i not in exclude and
+                        valid_items = [i for i in base if i not in exclude and
                                        i.hard_tier <= tiers_allowed and not i.reuseable]
                 # Neither Sb nor Sv
                 else:
                     if shop.index == 8:
-                        valid_items = [i for i in base if shop.is_item_allowed(i) and i not in exclude and
+                        valid_items = [i for i in base if i not in exclude and
                                        i.hard_tier <= tiers_allowed and not i.reuseable]
                     else:
                         valid_items = [i for i in base if i not in done_already and i not in exclude and
-                                       shop.is_item_allowed(i) and i.hard_tier <= tiers_allowed]
+                                       i.hard_tier <= tiers_allowed]
                 return valid_items
 
             # Do juice bar before frog coin shops. Frog coin shops dont leave enough items for juice bar in Sv1.
@@ -686,6 +685,7 @@ def randomize_all(world):
                                 assignments[shop.index].append(item)
                 # Assign each item to one shop by default
                 for item in item_reserve:
+                    world.deadline.check()
                     if item not in assignments[12]:
                         eligible_shops = [s for s in world.shops if len(assignments[s.index]) < 15 and s.index not in [3, 6, 8, 9, 10, 11, 12] and item in get_valid_items(item_reserve, s, assignments[s.index])]
                         if eligible_shops:
@@ -777,6 +777,10 @@ def randomize_all(world):
             if item.index == 175:
                 item.status_immunities = [random.randint(0, 7)]
 
+    # Prices changed above, so any eligibility or ranks computed during the shop shuffle are stale.
+    world.registry.invalidate_eligibility()
+    world.registry.invalidate_ranks()
+
 
 def get_spoiler(world):
     acc = {}
@@ -24,6 +24,43 @@ class Inventory(list):
         return any([i for i in self if i == item])
 
 
+class InventoryBits:
+    """Compact inventory for playthrough calculation that tracks collected items as a bitmask of item indexes.  This
+    supports the same has_item check the location access functions use, without scanning a list each time.
+    """
+    __slots__ = ('mask',)
+
+    def __init__(self, mask=0):
+        """
+
+        Args:
+            mask (int): Starting bitmask of collected item indexes.
+
+        """
+        self.mask = mask
+
+    def has_item(self, item):
+        """
+
+        Args:
+            item: Item class or instance to check for.
+
+        Returns:
+            bool: True if inventory contains this item, False otherwise.
+
+        """
+        return bool((self.mask >> item.index) & 1)
+
+    def add_item(self, item):
+        """
+
+        Args:
+            item: Item class or instance to add.
+
+        """
+        self.mask |= 1 << item.index
+
+
 def item_location_filter(world, location):
     """Filter function for key item locations based on whether Seed/Fertilizer are included.
 
@@ -98,12 +135,14 @@ def _place_items(world, items, locations, base_inventory=None):
 
     # For each required item, place it assuming we can get all other items.
     for item in items:
+        world.deadline.check()
+
         # Get items we can get assuming we have everything but the one we're placing.
         remaining_fill_items.remove(item)
         assumed_items = _collect_items(world, remaining_fill_items + base_inventory)
 
         fillable_locations = [l for l in locations if not l.has_item and l.can_access(assumed_items)
-                              and l.item_allowed(item)]
+                              and world.registry.item_allowed(l, item)]
         if not fillable_locations:
             raise ValueError("No available locations for {}, {}".format(item, remaining_fill_items))
 
@@ -131,6 +170,7 @@ def _collect_items(world, collected=None):
 
     # Search all locations and collect items until we can't get any more.
     while True:
+        world.deadline.check()
         search_locations = [l for l in available_locations if l.can_access(my_items)]
         available_locations = [l for l in available_locations if l not in search_locations]
         found_items = Inventory([l.item for l in search_locations])
@@ -141,6 +181,47 @@ def _collect_items(world, collected=None):
     return my_items
 
 
+def get_playthrough(world):
+    """Compute the progression spheres for the current item placement.  Each sphere is the set of locations reachable
+    with the items collected from all previous spheres, so the first sphere is everything available from the start.
+
+    Args:
+        world (randomizer.logic.main.GameWorld): Game world
+
+    Returns:
+        dict: Sphere name mapped to a dictionary of location name to required item name found in that sphere.
+
+    """
+    inventory = InventoryBits()
+    remaining = [l for l in world.key_locations + world.chest_locations if l.has_item]
+    playthrough = {}
+
+    # Collect everything reachable with the current inventory in one step, then add those items for the next sphere.
+    while remaining:
+        reachable = []
+        blocked = []
+        for location in remaining:
+            if location.can_access(inventory):
+                reachable.append(location)
+            else:
+                blocked.append(location)
+        if not reachable:
+            break
+        remaining = blocked
+
+        sphere = {}
+        for location in reachable:
+            inventory.add_item(location.item)
+            if location.item.shuffle_type == randomizer.data.items.ItemShuffleType.Required:
+                sphere[location.name] = location.item.name if isinstance(location.item, randomizer.data.items.Item) \
+                    else location.item.__name__
+
+        if sphere:
+            playthrough['Sphere {}'.format(len(playthrough) + 1)] = sphere
+
+    return playthrough
+
+
 def randomize_all(world):
     """
 
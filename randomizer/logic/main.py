@@ -1,7 +1,9 @@
 # Main randomizer logic module that the front end calls.
 
 import collections
+import functools
 import hashlib
+import logging
 import random
 import re
 import binascii
@@ -25,22 +27,46 @@ from . import spells
 from . import utils
 from .patch import Patch
 from .battleassembler import assemble_battle_scripts
+from .deadline import Deadline
+from .version import VERSION
 
-# Current version number
-VERSION = '8.2.10'
+
+# Maximum number of times a single randomization step will be retried with a derived seed if its logic fails.
+MAX_SUBSYSTEM_RETRIES = 5
+
+logger = logging.getLogger(__name__)
+
+# Randomization steps in order, as (name, randomize function, retry).  The later steps can fail on an unlucky roll, so
+# they are retried on their own with a derived seed.
+RANDOMIZE_STEPS = (
+    ('characters', characters.randomize_all, False),
+    ('spells', spells.randomize_all, False),
+    ('items', items.randomize_all, False),
+    ('enemies', enemies.randomize_all, False),
+    ('bosses', bosses.randomize_all, False),
+    ('keys', keys.randomize_all, True),
+    ('chests', chests.randomize_all, True),
+    ('games', games.randomize_all, True),
+    ('dialogs', dialogs.randomize_all, True),
+)
 
 
 class Settings:
-    def __init__(self, mode, debug_mode=False, flag_string=''):
+    def __init__(self, mode, debug_mode=False, flag_string='', stat_mutation=utils.STAT_MUTATION_LEGACY):
         """Provide either form data fields or flag string to set flags on creation.
 
         Args:
             mode (str): Should be standard or open.
             debug_mode (bool): Debug flag.
             flag_string (str): Flag string if parsing flags from string.
+            stat_mutation (str): Stat mutation generator, one of utils.STAT_MUTATIONS.
         """
+        if stat_mutation not in utils.STAT_MUTATIONS:
+            raise ValueError("Unknown stat mutation generator {!r}".format(stat_mutation))
+
         self._mode = mode
         self._debug_mode = debug_mode
+        self._stat_mutation = stat_mutation
         self._enabled_flags = set()
 
         # If flag string provided, make fake form data based on it to parse.
@@ -114,6 +140,11 @@ class Settings:
         """:rtype: bool"""
         return self._debug_mode
 
+    @property
+    def stat_mutation(self):
+        """:rtype: str"""
+        return self._stat_mutation
+
     def _build_flag_string_part(self, flag, flag_strings):
         """
 
@@ -204,17 +235,28 @@ class GameWorld:
     a single instance of the world.
     """
 
-    def __init__(self, seed, settings):
+    def __init__(self, seed, settings, deadline=None):
         """
         :type seed: int
         :type settings: randomizer.logic.main.Settings
+        :type deadline: randomizer.logic.deadline.Deadline
         """
         self.seed = seed
         self.settings = settings
+        self.deadline = deadline if deadline is not None else Deadline()
         self.file_select_character = 'Mario'
         self.file_select_hash = 'MARIO1 / MARIO2 / MARIO3 / MARIO4'
         self._rebuild_hash()
 
+        # Failure and retry counts for each randomization step, keyed by step name.
+        self.subsystem_stats = {}
+
+        # Batch stat mutator with its own random stream, if this world opted into one.
+        if settings.stat_mutation == utils.STAT_MUTATION_LEGACY:
+            self.batch_mutator = None
+        else:
+            self.batch_mutator = utils.BatchMutator(self._derive_seed('stat mutation', 0))
+
         # Bundt palette swap flag.
         self.chocolate_cake = False
 
@@ -251,20 +293,82 @@ class GameWorld:
         self.enemy_formations_dict = dict((f.index, f) for f in self.enemy_formations)
         self.formation_packs_dict = dict((p.index, p) for p in self.formation_packs)
 
-        # Get item location data.
-        self.key_locations = data.keys.get_default_key_item_locations(self)
-        self.chest_locations = data.chests.get_default_chests(self)
+        # Item locations, boss locations, minigames and strings are only built on first use, see the properties below.
+
+        # Indexed lookups over this world's data.
+        self.registry = data.registry.WorldRegistry(self)
+
+        # Table buffers for packing ROM records, replaced for every patch build.
+        self.patch_tables = utils.PatchTables()
+
+    # Subsystems that only some modes and flags use, built the first time they're needed.  Linear mode and light flag
+    # sets never build most of them.
+
+    @functools.cached_property
+    def key_locations(self):
+        """
+        Returns:
+            list[randomizer.data.locations.ItemLocation]: Key item locations.
+        """
+        return data.keys.get_default_key_item_locations(self)
+
+    @functools.cached_property
+    def chest_locations(self):
+        """
+        Returns:
+            list[randomizer.data.locations.ItemLocation]: Chest and reward locations.
+        """
+        return data.chests.get_default_chests(self)
+
+    @functools.cached_property
+    def boss_locations(self):
+        """
+        Returns:
+            list[randomizer.data.bosses.BossLocation|randomizer.data.bosses.StarLocation]: Boss locations.
+        """
+        return data.bosses.get_default_boss_locations(self)
+
+    @functools.cached_property
+    def ball_solitaire(self):
+        """
+        Returns:
+            randomizer.data.games.BallSolitaireGame: Ball solitaire minigame.
+        """
+        return data.games.BallSolitaireGame(self)
+
+    @functools.cached_property
+    def magic_buttons(self):
+        """
+        Returns:
+            randomizer.data.games.MagicButtonsGame: Magic buttons minigame.
+        """
+        return data.games.MagicButtonsGame(self)
+
+    @functools.cached_property
+    def wishes(self):
+        """
+        Returns:
+            randomizer.data.dialogs.Wishes: Wish strings.
+        """
+        return data.dialogs.Wishes(self)
 
-        # Get boss location data.
-        self.boss_locations = data.bosses.get_default_boss_locations(self)
+    @functools.cached_property
+    def quiz(self):
+        """
+        Returns:
+            randomizer.data.dialogs.Quiz: Quiz questions.
+        """
+        return data.dialogs.Quiz(self)
 
-        # Minigame data.
-        self.ball_solitaire = data.games.BallSolitaireGame(self)
-        self.magic_buttons = data.games.MagicButtonsGame(self)
+    def is_built(self, name):
+        """
+        Args:
+            name (str): Name of a lazily built subsystem attribute.
 
-        # String data.
-        self.wishes = data.dialogs.Wishes(self)
-        self.quiz = data.dialogs.Quiz(self)
+        Returns:
+            bool: True if the subsystem has been built for this world, False otherwise.
+        """
+        return name in self.__dict__
 
     @property
     def open_mode(self):
@@ -325,19 +429,86 @@ class GameWorld:
         # Seed the PRNG at the start.
         random.seed(self.seed)
 
-        characters.randomize_all(self)
-        spells.randomize_all(self)
-        items.randomize_all(self)
-        enemies.randomize_all(self)
-        bosses.randomize_all(self)
-        keys.randomize_all(self)
-        chests.randomize_all(self)
-        games.randomize_all(self)
-        dialogs.randomize_all(self)
+        for name, randomize_func, retry in RANDOMIZE_STEPS:
+            self.randomize_step(name, randomize_func, retry)
 
         # Rebuild hash after randomization.
+        self.deadline.enter('randomize done')
         self._rebuild_hash()
 
+    def randomize_step(self, name, randomize_func, retry=False):
+        """Run a single randomization step.
+
+        Args:
+            name (str): Name of the step.
+            randomize_func: Function taking this world to randomize the step.
+            retry (bool): Retry the step with a derived seed if its logic fails.
+
+        """
+        if retry:
+            self._randomize_with_retries(name, randomize_func)
+        else:
+            self.deadline.enter('randomize ' + name)
+            randomize_func(self)
+
+    def _randomize_with_retries(self, name, randomize_func):
+        """Run a randomization step, and if its logic fails, restore the item locations and run the step again.  The
+        first attempt continues the main random stream, and each retry reseeds with a sub-seed derived from the world
+        seed so the result is still reproducible from the original seed.
+
+        Args:
+            name (str): Name of the step for sub-seeds and stats.
+            randomize_func: Function taking this world to randomize the step.
+
+        """
+        self.deadline.enter('randomize ' + name)
+        stats = self.subsystem_stats.setdefault(name, {'failures': 0, 'retries': 0})
+
+        # Item placements are the only state these steps share, so save them to restore before each retry.  Locations that
+        # haven't been built yet don't need saving: a retry just drops whatever the failed attempt built.
+        location_names = ('key_locations', 'chest_locations')
+        unbuilt = [attr for attr in location_names if not self.is_built(attr)]
+        saved_locations = [(l, l.__dict__.copy()) for attr in location_names if self.is_built(attr)
+                           for l in getattr(self, attr)]
+
+        attempt = 0
+        while True:
+            try:
+                randomize_func(self)
+                return
+            except flags.FlagError:
+                raise
+            except ValueError as e:
+                stats['failures'] += 1
+                if attempt >= MAX_SUBSYSTEM_RETRIES:
+                    raise
+
+                attempt += 1
+                stats['retries'] += 1
+                logger.warning("Retrying {} for seed {} (attempt {}): {}".format(name, self.seed, attempt, e))
+
+                self.deadline.check()
+                for location, state in saved_locations:
+                    location.__dict__.clear()
+                    location.__dict__.update(state)
+                for attr in unbuilt:
+                    self.__dict__.pop(attr, None)
+                self.registry.invalidate_locations()
+                random.seed(self._derive_seed(name, attempt))
+
+    def _derive_seed(self, name, attempt):
+        """
+        Args:
+            name (str): Name of the randomization step.
+            attempt (int): Retry attempt number.
+
+        Returns:
+            int: 32 bit sub-seed for this step and attempt, derived from the world seed.
+
+        """
+        h = hashlib.sha256('{}:{}:{}'.format(self.seed, name, attempt).encode('utf-8')).digest()
+        return int.from_bytes(h[:4], 'big')
+
     def _rebuild_hash(self):
         """Build hash value for choosing file select character and file name hash.
         Use the same version, seed, mode, and flags used for the database hash.
@@ -347,6 +518,8 @@ class GameWorld:
         final_seed += self.seed.to_bytes(4, 'big')
         final_seed += self.settings.mode.encode('utf-8')
         final_seed += self.settings.flag_string.encode('utf-8')
+        if self.settings.stat_mutation != utils.STAT_MUTATION_LEGACY:
+            final_seed += self.settings.stat_mutation.encode('utf-8')
         self.hash = hashlib.md5(final_seed).hexdigest()
 
     def build_patch(self):
@@ -355,8 +528,10 @@ class GameWorld:
         :rtype: randomizer.logic.patch.Patch
         """
         patch = Patch()
+        self.patch_tables = utils.PatchTables()
 
         # Characters
+        self.deadline.enter('build_patch characters')
         for character in self.characters:
             patch += character.get_patch()
 
@@ -566,6 +741,7 @@ class GameWorld:
         patch += self.levelup_xps.get_patch()
 
         # Spells
+        self.deadline.enter('build_patch spells')
         for spell in self.spells:
             patch += spell.get_patch()
 
@@ -593,31 +769,44 @@ class GameWorld:
             patch.add_data(0x14ca6c, bytes([0xA5]))
 
         # Items
+        self.deadline.enter('build_patch items')
         for item in self.items:
+            self.deadline.check()
             patch += item.get_patch()
         patch += data.items.Item.build_descriptions_patch(self)
 
         # Shops
+        self.deadline.enter('build_patch shops')
         for shop in self.shops:
             patch += shop.get_patch()
 
         # Enemies
+        self.deadline.enter('build_patch enemies')
         for enemy in self.enemies:
+            self.deadline.check()
             patch += enemy.get_patch()
             enemy.patch_script()
         patch += data.enemies.Enemy.build_psychopath_patch(self)
 
         # Enemy attacks
+        self.deadline.enter('build_patch enemy attacks')
         for attack in self.enemy_attacks:
             patch += attack.get_patch()
 
         # Enemy formations
+        self.deadline.enter('build_patch enemy formations')
         for formation in self.enemy_formations:
+            self.deadline.check()
             patch += formation.get_patch()
 
+        # Records the data classes above packed into table buffers, added in runs of records next to each other.
+        self.deadline.enter('build_patch record tables')
+        self.patch_tables.add_to_patch(patch)
+
         # Open mode specific data.
         if self.open_mode:
             # Item locations.
+            self.deadline.enter('build_patch item locations')
             # FIXME
             # for location in self.key_locations + self.chest_locations:
             #     print(">>>>>>>> {}".format(location))
@@ -629,6 +818,7 @@ class GameWorld:
                 patch += location.get_patch()
 
             # Boss locations.
+            self.deadline.enter('build_patch boss locations')
             for boss in self.boss_locations:
                 # FIXME
                 # print(">>>>>>>>>>>>>>>> {}".format(boss))
@@ -662,13 +852,20 @@ class GameWorld:
                 patch.add_data(0x39bc52, utils.ByteField(exps[6]).as_bytes())  # 6/7 stars
                 patch.add_data(0x1fd32d, utils.ByteField(0xa0).as_bytes())  # Enable flag
 
-            # Minigames
-            patch += self.ball_solitaire.get_patch()
-            patch += self.magic_buttons.get_patch()
+            # Minigames.  Games that were never built still have their vanilla puzzle, so use the shared vanilla patch.
+            self.deadline.enter('build_patch minigames')
+            for name, cls in (('ball_solitaire', data.games.BallSolitaireGame),
+                              ('magic_buttons', data.games.MagicButtonsGame)):
+                if self.is_built(name):
+                    patch += getattr(self, name).get_patch()
+                else:
+                    patch += data.games.get_vanilla_patch(cls)
 
-            # Dialogs
-            patch += self.wishes.get_patch()
-            patch += self.quiz.get_patch()
+            # Dialogs.  These are empty until randomized, so there's nothing to patch if they were never built.
+            if self.is_built('wishes'):
+                patch += self.wishes.get_patch()
+            if self.is_built('quiz'):
+                patch += self.quiz.get_patch()
 
             # FIXME
             # print(">>>>>>>> WISHES")
@@ -684,6 +881,7 @@ class GameWorld:
             patch += map.unlock_world_map()
 
         # Bowser's Keep doors
+        self.deadline.enter('build_patch doors')
         patch += doors.patch_bowser_doors(self)
 
         # factory warp
@@ -729,6 +927,7 @@ class GameWorld:
 
         # Overworld boss sprites
         if self.open_mode:
+            self.deadline.enter('build_patch overworld bosses')
             patch += bosses_overworld.patch_overworld_bosses(self)
 
         # Patch removes ANDing by current party from shop menu code.
@@ -737,15 +936,18 @@ class GameWorld:
             patch.add_data(0x033B6D, bytes([0x29, 0x1F, 0xEA]))
 
         # This needs to happen after all battle script randomization.
+        self.deadline.enter('build_patch battle scripts')
         patch += assemble_battle_scripts(self)
 
         # Credit update
+        self.deadline.enter('build_patch credits')
         patch += credits.update_credits(self)
 
         # Choose character for the file select screen.
+        self.deadline.enter('build_patch file select')
         i = cursor_id
         file_select_char_bytes = [0, 7, 13, 25, 19]
-        self.file_select_character = [c for c in self.characters if c.index == i][0].__class__.__name__
+        self.file_select_character = self.registry.character(i).__class__.__name__
 
         # Change file select character graphic, if not Mario.
         if i != 0:
@@ -820,4 +1022,9 @@ class GameWorld:
             spoiler['Boss Locations'] = bosses.get_spoiler(self)
             spoiler['Item Locations'] = items.get_spoiler(self)
 
+            # Progression spheres are only interesting when key items have actually moved.
+            if (self.settings.is_flag_enabled(flags.KeyItemShuffle) or
+                    self.settings.is_flag_enabled(flags.ChestIncludeKeyItems)):
+                spoiler['Playthrough'] = keys.get_playthrough(self)
+
         return spoiler
@@ -48,7 +48,7 @@ class Patch:
 
         :param addr: Address for the start of the data.
         :type addr: int
-        :rtype: bytearray|bytes|list[int]
+        :rtype: bytearray|bytes|memoryview|list[int]
         """
         return self._data.get(addr, bytes())
 
@@ -58,7 +58,7 @@ class Patch:
         :param addr: Address for the start of the data.
         :type addr: int
         :param data: Patch data as raw bytes.
-        :type data: bytearray|bytes|list[int]|int|str
+        :type data: bytearray|bytes|memoryview|list[int]|int|str
         """
         # For integers and strings, convert them to byte representations.
         if isinstance(data, int) and data <= 0xff:
@@ -95,8 +95,8 @@ class PatchJSONEncoder(DjangoJSONEncoder):
     """Extension of the Django JSON serializer to support randomizer patch data."""
 
     def default(self, o):
-        # Support bytes and bytearray objects, which are just lists of integers.
-        if isinstance(o, (bytearray, bytes)):
+        # Support bytes, bytearray and memoryview objects, which are just lists of integers.
+        if isinstance(o, (bytearray, bytes, memoryview)):
             return list(o)
         elif isinstance(o, Patch):
             return o.for_json()
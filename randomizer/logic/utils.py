@@ -1,12 +1,22 @@
 # Common utilities for outputting binary data for the patches, and shuffling stat values.
 
+import contextlib
+import gc
 import inspect
 import random
 import re
+import struct
+import weakref
 
 # Amount to boost very small values when shuffling to give a bit more range for very small values.
 SMALL_BOOST_AMOUNT = 2.0
 
+# Stat mutation generators.  Legacy is the scalar mutate_normal on the global random module and stays the default so
+# existing seeds reproduce.  Batch generators are versioned, and a version's output must never change once released.
+STAT_MUTATION_LEGACY = 'legacy'
+STAT_MUTATION_BATCH_V1 = 'batch-v1'
+STAT_MUTATIONS = (STAT_MUTATION_LEGACY, STAT_MUTATION_BATCH_V1)
+
 
 def isclass_or_instance(obj_or_cls, classinfo):
     """Helper function to check if an object is an instance of a class, or the class itself."""
@@ -72,6 +82,184 @@ class ByteField:
         return "ByteField(current value: {}, number of bytes: {}".format(self.value, self._num_bytes)
 
 
+def bits(values):
+    """Convert bit positions to an integer bitmap, like BitMapSet does.
+
+    :type values: collections.abc.Iterable[int]
+    :rtype: int
+    """
+    result = 0
+    for value in values:
+        result |= (1 << value)
+    return result
+
+
+class RecordLayout:
+    """Declarative layout of a fixed-size ROM record, as a list of (field name, struct format code) pairs.  Fields are
+    little-endian and unsigned, but negative values are stored as two's complement the same way ByteField does.
+
+    Records that are part of a larger table are packed into a buffer for the whole table, which is allocated once per
+    patch build.  Layouts with the same table name share the buffer, which lets variable-length records use a different
+    layout for each length.
+    """
+
+    def __init__(self, *fields, table=None, stride=None, count=1):
+        """
+        :param fields: (field name, struct format code) pairs in record order.
+        :type fields: tuple[str, str]
+        :param table: Name of the table buffer to pack into, defaults to a table for this layout only.
+        :type table: str|None
+        :param stride: Size of each record in the table, defaults to the layout size.
+        :type stride: int|None
+        :param count: Number of records in the table.
+        :type count: int
+        """
+        self.names = [name for name, code in fields]
+        self.struct = struct.Struct('<' + ''.join(code for name, code in fields))
+        self.size = self.struct.size
+        self.table = table if table is not None else self
+        self.stride = stride if stride is not None else self.size
+        self.count = count
+        self._moduli = [1 << (struct.calcsize(code) * 8) for name, code in fields]
+
+        if self.size > self.stride:
+            raise ValueError("Record layout is {} bytes, larger than stride {}".format(self.size, self.stride))
+
+    def _values(self, values):
+        if len(values) != len(self._moduli):
+            raise ValueError("Expected {} values for fields {}, got {}".format(len(self._moduli), self.names,
+                                                                               len(values)))
+        return [value + modulus if value < 0 else value for value, modulus in zip(values, self._moduli)]
+
+    def pack(self, *values):
+        """Pack a single record.
+
+        :rtype: bytes
+        """
+        return self.struct.pack(*self._values(values))
+
+    def pack_into(self, buffer, offset, *values):
+        """Pack a record into a buffer at the given offset.
+
+        :type buffer: bytearray
+        :type offset: int
+        """
+        self.struct.pack_into(buffer, offset, *self._values(values))
+
+    def add_record(self, patch, tables, slot, addr, *values):
+        """Pack a record for a ROM address.  With table buffers, the record is packed into its slot in the table and the
+        tables add it to the patch later, merged with the records next to it.  Otherwise it's added to the patch now.
+
+        :type patch: randomizer.logic.patch.Patch
+        :type tables: PatchTables|None
+        :param slot: Record number within the table.
+        :type slot: int
+        :param addr: ROM address of the record.
+        :type addr: int
+        """
+        if tables is None:
+            patch.add_data(addr, self.pack(*values))
+            return
+        buffer = tables.get_buffer(self.table, self.stride * self.count)
+        offset = slot * self.stride
+        self.pack_into(buffer, offset, *values)
+        tables.add_record(self.table, addr, offset, self.size)
+
+
+class PatchTables:
+    """Table buffers for RecordLayout packing while building one patch, and the ROM address of each packed record."""
+
+    def __init__(self):
+        self._buffers = {}
+        self._records = {}
+
+    def get_buffer(self, table, size):
+        """Get the buffer for a table, allocating it the first time.
+
+        :param table: Table name.
+        :param size: Size of the table buffer in bytes.
+        :type size: int
+        :rtype: memoryview
+        """
+        buffer = self._buffers.get(table)
+        if buffer is None:
+            buffer = self._buffers[table] = memoryview(bytearray(size))
+            self._records[table] = {}
+        return buffer
+
+    def add_record(self, table, addr, offset, size):
+        """Record that a record packed into a table belongs at a ROM address.  Packing the same address again replaces
+        it, the same as adding patch data to the same address does.
+
+        :param table: Table name.
+        :param addr: ROM address of the record.
+        :type addr: int
+        :param offset: Offset of the record in the table buffer.
+        :type offset: int
+        :param size: Size of the record in bytes.
+        :type size: int
+        """
+        self._records[table][addr] = (offset, size)
+
+    def add_to_patch(self, patch):
+        """Add the packed records to a patch.  Records that are next to each other both in the ROM and in their table
+        buffer are added as one run, a view of that span of the buffer.  The records are cleared once they're added, so
+        only the buffers stay alive with the patch.
+
+        :type patch: randomizer.logic.patch.Patch
+        """
+        for table, records in self._records.items():
+            buffer = self._buffers[table]
+            run_addr = run_start = run_end = None
+            for addr in sorted(records):
+                offset, size = records[addr]
+                if run_addr is not None and addr == run_addr + run_end - run_start and offset == run_end:
+                    run_end += size
+                    continue
+                if run_addr is not None:
+                    patch.add_data(run_addr, buffer[run_start:run_end])
+                run_addr, run_start, run_end = addr, offset, offset + size
+            if run_addr is not None:
+                patch.add_data(run_addr, buffer[run_start:run_end])
+            records.clear()
+
+
+class WeakAttribute:
+    """Descriptor for an attribute that only holds a weak reference to its value, for back references to objects that
+    own this one.  Data objects refer back to their game world, and the world holds all its objects, so a strong
+    reference would make a finished world one big reference cycle.  With weak back references it is freed by reference
+    counting as soon as nothing outside it holds on to it, instead of waiting for the cyclic garbage collector.
+    """
+
+    def __set_name__(self, owner, name):
+        self.attr = '_' + name + '_ref'
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        ref = obj.__dict__.get(self.attr)
+        return ref() if ref is not None else None
+
+    def __set__(self, obj, world):
+        obj.__dict__[self.attr] = weakref.ref(world) if world is not None else None
+
+
+@contextlib.contextmanager
+def gc_paused():
+    """Context manager that disables the cyclic garbage collector while generating a seed, since generation allocates
+    lots of objects but frees them by reference counting.  The young generations are collected afterwards to pick up any
+    cycles that were created.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+        gc.collect(1)
+
+
 class Mutator:
     """Mutator class that shuffles stat attributes based on min/max values and a difficulty setting."""
 
@@ -130,6 +318,70 @@ class Mutator:
             return value
 
 
+class BatchMutator:
+    """Vectorized version of Mutator.mutate_normal that mutates a whole column of values at once with NumPy.  It has
+    the same distribution shape, but draws from its own random stream so it doesn't disturb the global random module.
+    """
+    version = STAT_MUTATION_BATCH_V1
+
+    def __init__(self, seed):
+        """
+        :param seed: Seed for this mutator's random stream.
+        :type seed: int
+        """
+        # NumPy is only needed here and it's slow to import, so it's imported when a batch mutator is first made.
+        import numpy
+        self.numpy = numpy
+        self.rng = numpy.random.Generator(numpy.random.PCG64(seed))
+
+    def mutate_normal(self, values, minimum=0, maximum=0xff):
+        """Mutate a column of values, each within its range.
+
+        :param values: Values to mutate.
+        :type values: collections.abc.Sequence[int]
+        :param minimum: Minimum for all values, or a sequence with the minimum for each.
+        :param maximum: Maximum for all values, or a sequence with the maximum for each.
+        :return: Mutated values.
+        :rtype: list[int]
+        """
+        numpy = self.numpy
+        current = numpy.asarray(values, dtype=float)
+        minimum = numpy.broadcast_to(numpy.asarray(minimum, dtype=float), current.shape)
+        maximum = numpy.broadcast_to(numpy.asarray(maximum, dtype=float), current.shape)
+        result = numpy.zeros(current.shape)
+        pending = numpy.arange(current.size)
+
+        # Each pass mutates every pending value once, and the 1/10 that chain mutate stay pending for another pass.
+        while pending.size:
+            lo, hi = minimum[pending], maximum[pending]
+            value = numpy.clip(current[pending], lo, hi)
+
+            # Shuffle the distance to the nearer of the minimum or maximum.
+            reverse = value > (lo + hi) / 2
+            distance = numpy.where(reverse, hi - value, value - lo)
+
+            # For very small values, give a small boost amount to allow for a bit more variance.
+            small = distance < SMALL_BOOST_AMOUNT
+            distance = numpy.where(small, distance + SMALL_BOOST_AMOUNT, distance)
+            boosted = small & (distance > 0)
+            distance = numpy.where(small & ~boosted, 0, distance)
+
+            half = distance / 2.0
+            a, b = self.rng.random(pending.size), self.rng.random(pending.size)
+            distance = numpy.where(distance > 0, half + (half * a) + (half * b), distance)
+            distance = numpy.where(boosted, distance - SMALL_BOOST_AMOUNT, distance)
+
+            value = numpy.where(reverse, hi - distance, distance + lo)
+            current[pending] = value
+
+            chain = self.rng.integers(1, 11, size=pending.size) == 10
+            done = ~chain
+            result[pending[done]] = numpy.rint(numpy.clip(value[done], lo[done], hi[done]))
+            pending = pending[chain]
+
+        return [int(v) for v in result]
+
+
 class _GlobalMutator:
     """Container class for the global mutator instance so we can control the difficulty."""
     mutator = Mutator()
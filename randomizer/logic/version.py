@@ -0,0 +1,2 @@
+# Current version number.  Kept in its own module so code that only needs the version doesn't import the randomizer.
+VERSION = '8.2.11'
@@ -0,0 +1,90 @@
+import contextlib
+import gc
+import resource
+import time
+
+from django.core.management.base import BaseCommand
+
+from randomizer.logic import utils
+from randomizer.logic.flags import AdvancedPreset
+from randomizer.logic.main import GameWorld, Settings
+
+
+def generate(seed, settings):
+    """Generate one seed, dropping the world when done like a web request does.
+
+    Args:
+        seed (int): Seed.
+        settings (randomizer.logic.main.Settings): Settings.
+
+    """
+    world = GameWorld(seed, settings)
+    world.randomize()
+    world.build_patch()
+
+
+class Command(BaseCommand):
+    help = 'Generate seeds and report garbage collector work and memory use, to check finished worlds are freed by ' \
+           'reference counting.'
+
+    def add_arguments(self, parser):
+        """Add optional arguments.
+
+        Args:
+            parser (argparse.ArgumentParser): Parser
+
+        """
+        parser.add_argument('-n', '--seeds', dest='seeds', type=int, default=50,
+                            help='Number of seeds to generate.  Default: %(default)s')
+
+        parser.add_argument('-s', '--seed', dest='seed', type=int, default=1,
+                            help='First seed.  Default: %(default)s')
+
+        parser.add_argument('-m', '--mode', dest='mode', default='open', choices=['linear', 'open'],
+                            help='Mode to use.  Default: %(default)s')
+
+        parser.add_argument('-f', '--flags', dest='flags', default=AdvancedPreset.flags,
+                            help='Flags string (from website).  Default: %(default)s')
+
+        parser.add_argument('--no-pause', dest='pause', action='store_false',
+                            help="Leave the garbage collector enabled during generation, for comparison.")
+
+    def handle(self, *args, **options):
+        settings = Settings(options['mode'], flag_string=options['flags'])
+        counts = [0, 0, 0]
+        collected = [0]
+        pauses = []
+        started = [0.0]
+
+        def track(phase, info):
+            if phase == 'start':
+                started[0] = time.perf_counter()
+            else:
+                pauses.append(time.perf_counter() - started[0])
+                counts[info['generation']] += 1
+                collected[0] += info['collected']
+
+        # Start from a clean heap so earlier imports don't count.
+        gc.collect()
+        start_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        gc.callbacks.append(track)
+        start = time.perf_counter()
+        try:
+            for seed in range(options['seed'], options['seed'] + options['seeds']):
+                with utils.gc_paused() if options['pause'] else contextlib.nullcontext():
+                    generate(seed, settings)
+            elapsed = time.perf_counter() - start
+            # Anything still uncollected is cyclic garbage left over from the seeds.
+            gc.collect()
+        finally:
+            gc.callbacks.remove(track)
+        end_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        self.stdout.write("Seeds: {} in {:.2f}s ({:.3f}s/seed)".format(options['seeds'], elapsed,
+                                                                       elapsed / options['seeds']))
+        self.stdout.write("GC collections by generation: {}".format(' / '.join(str(c) for c in counts)))
+        self.stdout.write("GC time: {:.1f} ms total, {:.1f} ms longest pause".format(sum(pauses) * 1000,
+                                                                                   max(pauses or [0]) * 1000))
+        self.stdout.write("Objects freed by GC: {} ({:.0f}/seed)".format(collected[0],
+                                                                        collected[0] / options['seeds']))
+        self.stdout.write("Max RSS: {:.1f} MB at start, {:.1f} MB at end".format(start_rss / 1024, end_rss / 1024))
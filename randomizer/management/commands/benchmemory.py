@@ -0,0 +1,215 @@
+import gc
+import json
+import resource
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+
+from randomizer.logic.flags import PRESETS
+from randomizer.logic.main import GameWorld, Settings
+from randomizer.logic.patch import PatchJSONEncoder
+from randomizer.logic.utils import gc_paused
+
+PHASES = ('__init__', 'randomize', 'build_patch', 'serialize')
+
+# Allocations made by the measurement itself.
+IGNORED_FILES = (tracemalloc.__file__, '<frozen importlib._bootstrap>', '<frozen importlib._bootstrap_external>')
+
+
+def current_rss():
+    """
+    Returns:
+        int: Current resident set size of this process in bytes.
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        # No procfs, so fall back to the peak, which still shows growth.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def format_bytes(size):
+    """
+    Args:
+        size (float): Size in bytes.
+
+    Returns:
+        str: Human readable size.
+
+    """
+    for unit in ('B', 'KB', 'MB'):
+        if abs(size) < 1024:
+            return '{:.1f} {}'.format(size, unit)
+        size /= 1024.0
+    return '{:.1f} GB'.format(size)
+
+
+def generate(seed, settings):
+    """Generate a seed the same way the generate view does, keeping everything it produces.
+
+    Args:
+        seed (int): Seed.
+        settings (randomizer.logic.main.Settings): Settings.
+
+    Returns:
+        tuple: World, patch and serialized patch and spoiler.
+
+    """
+    world = GameWorld(seed, settings)
+    with gc_paused():
+        world.randomize()
+        patch = world.build_patch()
+    return world, patch, (json.dumps(patch, cls=PatchJSONEncoder), json.dumps(world.spoiler, cls=PatchJSONEncoder))
+
+
+def measure_phases(seed, settings):
+    """Generate a seed while tracing memory, which must already be started.
+
+    Args:
+        seed (int): Seed.
+        settings (randomizer.logic.main.Settings): Settings.
+
+    Returns:
+        tuple: (phase, peak bytes, retained bytes) for each phase, relative to memory in use when the phase started,
+            and a snapshot taken with everything still alive.
+
+    """
+    results = []
+
+    def phase(name, func):
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        value = func()
+        current, peak = tracemalloc.get_traced_memory()
+        results.append((name, peak - before, current - before))
+        return value
+
+    world = phase('__init__', lambda: GameWorld(seed, settings))
+    with gc_paused():
+        phase('randomize', world.randomize)
+        patch = phase('build_patch', world.build_patch)
+    # Keep the serialized data alive for the snapshot, like the view does until the response is sent.
+    dumps = phase('serialize', lambda: (json.dumps(patch, cls=PatchJSONEncoder),
+                                        json.dumps(world.spoiler, cls=PatchJSONEncoder)))
+    return results, tracemalloc.take_snapshot()
+
+
+class Command(BaseCommand):
+    help = 'Measure the memory each phase of seed generation uses for every preset, and RSS growth over many seeds.'
+
+    def add_arguments(self, parser):
+        """Add optional arguments.
+
+        Args:
+            parser (argparse.ArgumentParser): Parser
+
+        """
+        parser.add_argument('-n', '--seeds', dest='seeds', type=int, default=3,
+                            help='Number of seeds to trace for each preset.  Default: %(default)s')
+
+        parser.add_argument('-m', '--mode', dest='mode', default='open', choices=['linear', 'open'],
+                            help='Mode to use.  Default: %(default)s')
+
+        parser.add_argument('-t', '--top', dest='top', type=int, default=10,
+                            help='Number of top allocating call sites to show for each preset.  Default: %(default)s')
+
+        parser.add_argument('--frames', dest='frames', type=int, default=1,
+                            help='Stack frames to group call sites by.  Default: %(default)s')
+
+        parser.add_argument('-g', '--generations', dest='generations', type=int, default=0,
+                            help='Also generate this many seeds untraced, cycling through the presets, and report RSS '
+                                 'growth.  Default: %(default)s')
+
+        parser.add_argument('--rss-every', dest='rss_every', type=int, default=100,
+                            help='Generations between RSS samples.  Default: %(default)s')
+
+    def trace_preset(self, preset, options):
+        """Trace and print the memory use of generating seeds with a preset.
+
+        Args:
+            preset (randomizer.logic.flags.Preset): Preset.
+            options (dict): Command options.
+
+        """
+        settings = Settings(options['mode'], flag_string=preset.flags)
+        # Lazy imports and module caches are filled by the first seed, so keep them out of the measurements.
+        generate(0, settings)
+        gc.collect()
+
+        tracemalloc.start(options['frames'])
+        try:
+            totals = dict((phase, [0, 0]) for phase in PHASES)
+            freed_to = []
+            snapshot = None
+            for seed in range(1, options['seeds'] + 1):
+                start = tracemalloc.get_traced_memory()[0]
+                base = tracemalloc.take_snapshot()
+                phases, snapshot = measure_phases(seed, settings)
+                for phase, peak, retained in phases:
+                    totals[phase][0] = max(totals[phase][0], peak)
+                    totals[phase][1] += retained
+                # The seed is dropped once measured, so anything left is kept by module level caches or leaked.
+                gc.collect()
+                freed_to.append(tracemalloc.get_traced_memory()[0] - start)
+        finally:
+            tracemalloc.stop()
+
+        self.stdout.write("{} ({} mode)".format(preset.name, options['mode']))
+        self.stdout.write("    {:12} {:>12} {:>12}".format('phase', 'peak', 'retained'))
+        for phase in PHASES:
+            peak, retained = totals[phase]
+            self.stdout.write("    {:12} {:>12} {:>12}".format(
+                phase, format_bytes(peak), format_bytes(retained / options['seeds'])))
+        self.stdout.write("    {:12} {:>12} {:>12}".format(
+            'total', '', format_bytes(sum(r for p, r in totals.values()) / options['seeds'])))
+        self.stdout.write("    left after freeing: {}".format(format_bytes(sum(freed_to) / len(freed_to))))
+
+        key = 'traceback' if options['frames'] > 1 else 'lineno'
+        filters = [tracemalloc.Filter(False, f) for f in IGNORED_FILES]
+        stats = snapshot.filter_traces(filters).compare_to(base.filter_traces(filters), key)
+        self.stdout.write("    top allocating call sites for seed {}:".format(options['seeds']))
+        for stat in [s for s in stats if s.size_diff > 0][:options['top']]:
+            self.stdout.write("    {:>12} {:>8} blocks  {}".format(
+                format_bytes(stat.size_diff), stat.count_diff,
+                ' <- '.join('{}:{}'.format(f.filename, f.lineno) for f in reversed(stat.traceback))))
+
+    def measure_rss(self, options):
+        """Generate seeds untraced, sampling the RSS to show steady state growth.
+
+        Args:
+            options (dict): Command options.
+
+        """
+        settings = [Settings(options['mode'], flag_string=preset.flags) for preset in PRESETS]
+        samples = []
+        start = time.perf_counter()
+        for i in range(options['generations']):
+            generate(i + 1, settings[i % len(settings)])
+            if (i + 1) % options['rss_every'] == 0:
+                samples.append((i + 1, current_rss()))
+                self.stdout.write("    {:>8} generations  RSS {}".format(i + 1, format_bytes(samples[-1][1])))
+        elapsed = time.perf_counter() - start
+
+        # Leave out the first fifth, while caches and the allocator's arenas are still filling up.
+        steady = samples[len(samples) // 5:]
+        if len(steady) < 2:
+            self.stdout.write("Not enough RSS samples for a growth rate, use more generations")
+            return
+        mean_x = sum(x for x, y in steady) / len(steady)
+        mean_y = sum(y for x, y in steady) / len(steady)
+        slope = sum((x - mean_x) * (y - mean_y) for x, y in steady) / sum((x - mean_x) ** 2 for x, y in steady)
+        self.stdout.write("{} generations in {:.1f}s, steady state RSS growth {} per 1000 generations".format(
+            options['generations'], elapsed, format_bytes(slope * 1000)))
+
+    def handle(self, *args, **options):
+        if options['seeds'] < 1:
+            raise CommandError("Need at least one seed to trace")
+
+        for preset in PRESETS:
+            self.trace_preset(preset, options)
+
+        if options['generations']:
+            self.stdout.write("RSS over {} generations".format(options['generations']))
+            self.measure_rss(options)
@@ -0,0 +1,165 @@
+import json
+import math
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from .generatesample import ALL_FLAGS
+from randomizer.logic.flags import PRESETS, FlagError
+from randomizer.logic.main import GameWorld, Settings
+from randomizer.logic.patch import PatchJSONEncoder
+from randomizer.logic.utils import gc_paused
+from randomizer.logic.version import VERSION
+
+PHASES = ('world', 'randomize', 'build_patch', 'serialize')
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(values, pct):
+    """
+    Args:
+        values (list[float]): Samples.
+        pct (float): Percentile from 0 to 100.
+
+    Returns:
+        float: Nearest rank percentile of the samples.
+
+    """
+    ordered = sorted(values)
+    rank = math.ceil(pct / 100.0 * len(ordered))
+    return ordered[min(max(rank, 1), len(ordered)) - 1]
+
+
+def summarize(values):
+    """
+    Args:
+        values (list[float]): Samples in seconds.
+
+    Returns:
+        dict[str, float]: Mean and percentiles of the samples.
+
+    """
+    summary = {'mean': sum(values) / len(values)}
+    for pct in PERCENTILES:
+        summary['p{}'.format(pct)] = percentile(values, pct)
+    return summary
+
+
+def find_regressions(results, baseline, threshold, stat='p50'):
+    """Compare results against a baseline run.
+
+    Args:
+        results (dict[str, dict]): Results for each case, keyed by case name.
+        baseline (dict[str, dict]): Baseline results in the same format.
+        threshold (float): Allowed slowdown as a fraction, i.e. 0.1 for 10%.
+        stat (str): Summary statistic to compare.
+
+    Returns:
+        list[str]: Description of each case and phase that got slower than allowed.
+
+    """
+    regressions = []
+    for case, result in results.items():
+        if case not in baseline:
+            continue
+        for phase, summary in result['phases'].items():
+            old = baseline[case]['phases'].get(phase, {}).get(stat)
+            if old and summary[stat] > old * (1 + threshold):
+                regressions.append("{} {}: {} {:.1f} ms -> {:.1f} ms (+{:.0%})".format(
+                    case, phase, stat, old * 1000, summary[stat] * 1000, summary[stat] / old - 1))
+    return regressions
+
+
+class Command(BaseCommand):
+    help = 'Benchmark end to end seed generation for every preset and all flags, in both modes.'
+
+    def add_arguments(self, parser):
+        """Add optional arguments.
+
+        Args:
+            parser (argparse.ArgumentParser): Parser
+
+        """
+        parser.add_argument('-n', '--seeds', dest='seeds', type=int, default=10,
+                            help='Number of seeds for each preset and mode.  Default: %(default)s')
+
+        parser.add_argument('-s', '--seed', dest='seed', type=int, default=1,
+                            help='First seed.  Default: %(default)s')
+
+        parser.add_argument('-m', '--mode', dest='modes', action='append', choices=['linear', 'open'],
+                            help='Mode to benchmark, can be given more than once.  Default: both')
+
+        parser.add_argument('-o', '--output', dest='output',
+                            help='Write the results to this JSON file.')
+
+        parser.add_argument('-b', '--baseline', dest='baseline',
+                            help='Compare against the results of a previous run from this JSON file.')
+
+        parser.add_argument('-t', '--threshold', dest='threshold', type=float, default=10,
+                            help='Fail if the median of any phase is this many percent slower than the baseline.  '
+                                 'Default: %(default)s')
+
+    def handle(self, *args, **options):
+        flag_sets = [(preset.name, preset.flags) for preset in PRESETS] + [('All flags', ALL_FLAGS)]
+        results = {}
+
+        for mode in options['modes'] or ['linear', 'open']:
+            for name, flag_string in flag_sets:
+                case = '{} {}'.format(mode, name)
+                times = dict((phase, []) for phase in PHASES)
+                failed = 0
+                start = time.perf_counter()
+
+                for seed in range(options['seed'], options['seed'] + options['seeds']):
+                    try:
+                        t0 = time.perf_counter()
+                        world = GameWorld(seed, Settings(mode, flag_string=flag_string))
+                        with gc_paused():
+                            t1 = time.perf_counter()
+                            world.randomize()
+                            t2 = time.perf_counter()
+                            patch = world.build_patch()
+                            t3 = time.perf_counter()
+                        json.dumps(patch, cls=PatchJSONEncoder)
+                        json.dumps(world.spoiler, cls=PatchJSONEncoder)
+                        t4 = time.perf_counter()
+                    except FlagError:
+                        # Some flag combinations can't generate with some seeds, just like on the site.
+                        failed += 1
+                        continue
+
+                    for phase, seconds in zip(PHASES, (t1 - t0, t2 - t1, t3 - t2, t4 - t3)):
+                        times[phase].append(seconds)
+
+                elapsed = time.perf_counter() - start
+                generated = options['seeds'] - failed
+                if not generated:
+                    self.stdout.write("{}: every seed failed".format(case))
+                    continue
+
+                results[case] = {
+                    'seeds_per_sec': generated / elapsed,
+                    'failed': failed,
+                    'phases': dict((phase, summarize(values)) for phase, values in times.items()),
+                }
+                totals = [sum(t) for t in zip(*times.values())]
+                results[case]['phases']['total'] = summarize(totals)
+
+                self.stdout.write("{}: {:.2f} seeds/sec{}".format(
+                    case, results[case]['seeds_per_sec'], ", {} failed".format(failed) if failed else ''))
+                for phase, summary in results[case]['phases'].items():
+                    self.stdout.write("    {:12} ".format(phase) + '  '.join(
+                        "p{} {:8.1f} ms".format(pct, summary['p{}'.format(pct)] * 1000) for pct in PERCENTILES))
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump({'version': VERSION, 'seeds': options['seeds'], 'results': results}, f, indent=2)
+
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+            regressions = find_regressions(results, baseline['results'], options['threshold'] / 100.0)
+            if regressions:
+                raise CommandError("Regressions over {:g}% against {} ({}):\n{}".format(
+                    options['threshold'], options['baseline'], baseline.get('version'), '\n'.join(regressions)))
+            self.stdout.write("No regressions over {:g}% against {}".format(options['threshold'], options['baseline']))
@@ -0,0 +1,149 @@
+import json
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from .benchseeds import PERCENTILES, find_regressions, summarize
+from randomizer.data.enemies import Enemy
+from randomizer.data.items import Item
+from randomizer.logic import bosses_overworld, credits, utils
+from randomizer.logic.battleassembler import assemble_battle_scripts
+from randomizer.logic.flags import AdvancedPreset
+from randomizer.logic.main import GameWorld, RANDOMIZE_STEPS, Settings
+from randomizer.logic.patch import Patch
+from randomizer.logic.version import VERSION
+
+
+def _randomize_case(index):
+    """
+    Args:
+        index (int): Index of the step in RANDOMIZE_STEPS.
+
+    Returns:
+        tuple: Benchmark case for the step, with a setup that runs every step before it.
+
+    """
+    name, randomize_func, retry = RANDOMIZE_STEPS[index]
+
+    def setup(world):
+        random.seed(world.seed)
+        for step in RANDOMIZE_STEPS[:index]:
+            world.randomize_step(*step)
+        return world
+
+    def run(world):
+        world.randomize_step(name, randomize_func, retry)
+
+    return 'randomize ' + name, setup, run
+
+
+def _randomized(world):
+    world.randomize()
+    world.patch_tables = utils.PatchTables()
+    return world
+
+
+def _patch_parts(world):
+    _randomized(world)
+    return world.patch_tables, [o.get_patch() for o in world.items + world.enemies + world.enemy_formations]
+
+
+def _merge_patches(tables_parts):
+    tables, parts = tables_parts
+    patch = Patch()
+    for part in parts:
+        patch += part
+    tables.add_to_patch(patch)
+
+
+# Benchmark cases as (name, setup, run).  Setup gets a new world and prepares the state the case needs, untimed, and run
+# does the timed work on whatever setup returned.
+CASES = [_randomize_case(i) for i in range(len(RANDOMIZE_STEPS))] + [
+    ('assemble_battle_scripts', _randomized, assemble_battle_scripts),
+    ('patch_overworld_bosses', _randomized, bosses_overworld.patch_overworld_bosses),
+    ('update_credits', _randomized, credits.update_credits),
+    ('Item.build_descriptions_patch', _randomized, Item.build_descriptions_patch),
+    ('Enemy.build_psychopath_patch', _randomized, Enemy.build_psychopath_patch),
+    ('Patch merges', _patch_parts, _merge_patches),
+]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark individual randomization and patch building subsystems against the same world state.'
+
+    def add_arguments(self, parser):
+        """Add optional arguments.
+
+        Args:
+            parser (argparse.ArgumentParser): Parser
+
+        """
+        parser.add_argument('cases', nargs='*',
+                            help='Only run cases whose name contains one of these.  Default: all of them: {}'.format(
+                                ', '.join(name for name, setup, run in CASES)))
+
+        parser.add_argument('-s', '--seed', dest='seed', type=int, default=1,
+                            help='Seed for the world state.  Default: %(default)s')
+
+        parser.add_argument('-m', '--mode', dest='mode', default='open', choices=['linear', 'open'],
+                            help='Mode to use.  Default: %(default)s')
+
+        parser.add_argument('-f', '--flags', dest='flags', default=AdvancedPreset.flags,
+                            help='Flags string (from website).  Default: %(default)s')
+
+        parser.add_argument('-n', '--repeat', dest='repeat', type=int, default=20,
+                            help='Timed repetitions of each case.  Default: %(default)s')
+
+        parser.add_argument('-w', '--warmup', dest='warmup', type=int, default=2,
+                            help='Untimed repetitions of each case before timing.  Default: %(default)s')
+
+        parser.add_argument('-o', '--output', dest='output',
+                            help='Write the results to this JSON file.')
+
+        parser.add_argument('-b', '--baseline', dest='baseline',
+                            help='Compare against the results of a previous run from this JSON file.')
+
+        parser.add_argument('-t', '--threshold', dest='threshold', type=float, default=10,
+                            help='Fail if the median of any case is this many percent slower than the baseline.  '
+                                 'Default: %(default)s')
+
+    def handle(self, *args, **options):
+        settings = Settings(options['mode'], flag_string=options['flags'])
+        key = '{} {}'.format(options['mode'], settings.flag_string)
+        cases = [c for c in CASES if not options['cases'] or any(f in c[0] for f in options['cases'])]
+        if not cases:
+            raise CommandError("No cases match {}".format(', '.join(options['cases'])))
+
+        results = {}
+        for name, setup, run in cases:
+            times = []
+            for i in range(options['warmup'] + options['repeat']):
+                state = setup(GameWorld(options['seed'], settings))
+                # The world is rebuilt for every repetition, so keep collections of the old ones out of the timings.
+                with utils.gc_paused():
+                    start = time.perf_counter()
+                    run(state)
+                    elapsed = time.perf_counter() - start
+                if i >= options['warmup']:
+                    times.append(elapsed)
+
+            results[name] = summarize(times)
+            results[name]['min'] = min(times)
+            self.stdout.write("{:32} min {:8.2f} ms  ".format(name, results[name]['min'] * 1000) + '  '.join(
+                "p{} {:8.2f} ms".format(pct, results[name]['p{}'.format(pct)] * 1000) for pct in PERCENTILES))
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump({'version': VERSION, 'seed': options['seed'], 'repeat': options['repeat'],
+                           'results': {key: {'phases': results}}}, f, indent=2)
+
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+            regressions = find_regressions({key: {'phases': results}}, baseline['results'],
+                                           options['threshold'] / 100.0)
+            if regressions:
+                raise CommandError("Regressions over {:g}% against {} ({}):\n{}".format(
+                    options['threshold'], options['baseline'], baseline.get('version'), '\n'.join(regressions)))
+            self.stdout.write("No regressions over {:g}% against {}".format(options['threshold'], options['baseline']))
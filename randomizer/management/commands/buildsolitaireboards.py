@@ -0,0 +1,34 @@
+import array
+import sys
+
+from django.core.management.base import BaseCommand
+
+from randomizer.data.games import BallSolitaireGame, SOLVABLE_BOARDS_FILE
+from randomizer.logic.games import enumerate_ball_solitaire_boards
+
+
+class Command(BaseCommand):
+    help = 'Build the library of solvable Ball Solitaire boards used for minigame shuffle.'
+
+    def add_arguments(self, parser):
+        """Add optional arguments.
+
+        Args:
+            parser (argparse.ArgumentParser): Parser
+
+        """
+        parser.add_argument('-m', '--min-balls', dest='min_balls', default=11, type=int,
+                            help='Minimum number of balls for a board.  Default: %(default)s')
+
+        parser.add_argument('-o', '--output', dest='output_file', default=SOLVABLE_BOARDS_FILE,
+                            help='Output file.  Default: %(default)s')
+
+    def handle(self, *args, **options):
+        boards = array.array('H', enumerate_ball_solitaire_boards(BallSolitaireGame(None), options['min_balls']))
+        if sys.byteorder != 'little':
+            boards.byteswap()
+
+        with open(options['output_file'], 'wb') as f:
+            boards.tofile(f)
+
+        self.stdout.write("Wrote {} boards to {}".format(len(boards), options['output_file']))
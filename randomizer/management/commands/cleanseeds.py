@@ -2,7 +2,7 @@ from django.core.management.base import BaseCommand
 from django.db import transaction
 from django.db.models import Q
 
-from randomizer.logic.main import VERSION
+from randomizer.logic.version import VERSION
 from randomizer.models import Seed
 
 
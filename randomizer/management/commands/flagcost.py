@@ -0,0 +1,199 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from randomizer.logic.flags import CATEGORIES, FlagError
+from randomizer.logic.main import GameWorld, Settings
+from randomizer.logic.utils import gc_paused
+
+
+def flag_variants(flag, prefix='', label=''):
+    """Walk a flag and its choices and options, getting the flag string that enables each one.  Choices and options are
+    enabled along with their parent flag.
+
+    Args:
+        flag (randomizer.logic.flags.Flag): Flag.
+        prefix (str): Flag string enabling the parent flag.
+        label (str): Label of the parent flag.
+
+    Returns:
+        list[tuple[str, str, str]]: (label, flag string, parent flag string) for the flag and everything under it.  Flags
+            starting with @ don't do anything on their own, so they only appear through their choices and options.
+
+    """
+    label = ' / '.join(l for l in (label, flag.name or flag.value) if l)
+    token = '' if flag.value.startswith('@') else flag.value
+    flag_string = ' '.join(s for s in (prefix, token) if s)
+
+    variants = []
+    if token:
+        variants.append((label, flag_string, prefix))
+    for child in flag.choices + flag.options:
+        variants += flag_variants(child, flag_string, label)
+    return variants
+
+
+def patch_size(patch):
+    """
+    Args:
+        patch (randomizer.logic.patch.Patch): Patch.
+
+    Returns:
+        int: Total bytes of patch data.
+
+    """
+    return sum(len(patch.get_data(addr)) for addr in patch.addresses)
+
+
+class Command(BaseCommand):
+    help = 'Measure the generation time and patch size each flag, choice and option adds over a baseline.'
+
+    def add_arguments(self, parser):
+        """Add optional arguments.
+
+        Args:
+            parser (argparse.ArgumentParser): Parser
+
+        """
+        parser.add_argument('filters', nargs='*',
+                            help='Only measure flags whose label or flag string contains one of these.')
+
+        parser.add_argument('-n', '--seeds', dest='seeds', type=int, default=3,
+                            help='Number of seeds for each flag.  Default: %(default)s')
+
+        parser.add_argument('-s', '--seed', dest='seed', type=int, default=1,
+                            help='First seed.  Default: %(default)s')
+
+        parser.add_argument('-m', '--mode', dest='mode', default='open', choices=['linear', 'open'],
+                            help='Mode to use.  Default: %(default)s')
+
+        parser.add_argument('-f', '--flags', dest='flags', default='',
+                            help='Baseline flag string that every measured flag is added to.  Default: no flags')
+
+        parser.add_argument('-o', '--output', dest='output',
+                            help='Write the costs to this JSON file, keyed by flag string.')
+
+    def measure(self, flag_string, seeds):
+        """Generate seeds with a flag string, after an untimed warm up seed.
+
+        Args:
+            flag_string (str): Flag string.
+            seeds (list[int]): Seeds.
+
+        Returns:
+            dict[int, tuple[float, int]]: (seconds, patch bytes) by seed, leaving out seeds that failed the flag logic.
+
+        """
+        settings = Settings(self.mode, flag_string=flag_string)
+
+        # Lazy imports and module caches are filled by the first seed that needs them, so keep them out of the timings
+        # with an untimed seed first.  Otherwise they land on the baseline, or whichever flag first uses them.
+        try:
+            self.generate(0, settings)
+        except FlagError:
+            pass
+
+        results = {}
+        for seed in seeds:
+            start = time.perf_counter()
+            try:
+                patch = self.generate(seed, settings)
+            except FlagError:
+                # Seeds the flag logic rejects are left out entirely rather than counted with a partial time.
+                continue
+            results[seed] = (time.perf_counter() - start, patch_size(patch))
+        return results
+
+    @staticmethod
+    def generate(seed, settings):
+        """
+        Args:
+            seed (int): Seed.
+            settings (randomizer.logic.main.Settings): Settings.
+
+        Returns:
+            randomizer.logic.patch.Patch: Patch for the seed.
+
+        """
+        world = GameWorld(seed, settings)
+        with gc_paused():
+            world.randomize()
+            return world.build_patch()
+
+    @staticmethod
+    def difference(results, base):
+        """
+        Args:
+            results (dict[int, tuple[float, int]]): Measurements by seed.
+            base (dict[int, tuple[float, int]]): Measurements to compare against by seed.
+
+        Returns:
+            tuple[float, float]: Mean extra seconds and patch bytes over the same seeds, or None if no seed worked for
+                both.
+
+        """
+        seeds = [s for s in results if s in base]
+        if not seeds:
+            return None
+        return (sum(results[s][0] - base[s][0] for s in seeds) / len(seeds),
+                sum(results[s][1] - base[s][1] for s in seeds) / len(seeds))
+
+    def handle(self, *args, **options):
+        self.mode = options['mode']
+        seeds = list(range(options['seed'], options['seed'] + options['seeds']))
+        baseline_flags = options['flags']
+        baseline_string = Settings(self.mode, flag_string=baseline_flags).flag_string
+
+        variants = []
+        for category in CATEGORIES:
+            for flag in category.flags:
+                variants += flag_variants(flag, label=category.name)
+        if options['filters']:
+            variants = [v for v in variants if any(f in v[0] or f in v[1] for f in options['filters'])]
+
+        base = self.measure(baseline_flags, seeds)
+        if not base:
+            raise CommandError("Every seed failed with the baseline flags {!r}".format(baseline_flags))
+        base_seconds = sum(t for t, size in base.values()) / len(base)
+        self.stdout.write("Baseline {!r}: {:.1f} ms, {} patch bytes".format(
+            baseline_string, base_seconds * 1000, int(sum(size for t, size in base.values()) / len(base))))
+
+        measured = {}
+        rows = []
+        for label, flag_string, parent in variants:
+            full = ' '.join(s for s in (baseline_flags, flag_string) if s)
+            # Skip flags that aren't available in this mode or are already part of the baseline.
+            if Settings(self.mode, flag_string=full).flag_string == baseline_string:
+                continue
+
+            measured[flag_string] = results = self.measure(full, seeds)
+            cost = self.difference(results, base)
+            parent_cost = self.difference(results, measured.get(parent, base))
+            failed = len(seeds) - len(results)
+            rows.append((label, flag_string, cost, parent_cost, failed))
+            self.stderr.write("{}: {}".format(flag_string, "{:+.1f} ms".format(cost[0] * 1000) if cost else 'failed'))
+
+        # Most expensive first, with flags that never generated at the end.
+        rows.sort(key=lambda r: -r[2][0] if r[2] else float('inf'))
+        self.stdout.write("{:>10} {:>10} {:>12}  {:6}  {:24} {}".format(
+            '+ms', '+ms parent', '+patch bytes', 'failed', 'flags', 'name'))
+        for label, flag_string, cost, parent_cost, failed in rows:
+            self.stdout.write("{:>10} {:>10} {:>12}  {:6}  {:24} {}".format(
+                "{:+.1f}".format(cost[0] * 1000) if cost else '-',
+                "{:+.1f}".format(parent_cost[0] * 1000) if parent_cost else '-',
+                "{:+.0f}".format(cost[1]) if cost else '-',
+                failed, flag_string, label))
+
+        if options['output']:
+            costs = dict((flag_string, {
+                'name': label,
+                'seconds': cost[0] if cost else None,
+                'parent_seconds': parent_cost[0] if parent_cost else None,
+                'patch_bytes': cost[1] if cost else None,
+                'failed': failed,
+            }) for label, flag_string, cost, parent_cost, failed in rows)
+            with open(options['output'], 'w') as f:
+                json.dump({'mode': self.mode, 'seeds': len(seeds), 'baseline': {
+                    'flags': baseline_string, 'seconds': base_seconds,
+                }, 'costs': costs}, f, indent=2)
@@ -0,0 +1,255 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+
+from randomizer.logic.flags import CATEGORIES, PRESETS
+from randomizer.logic.main import GameWorld, Settings
+from randomizer.logic.patch import Patch, PatchJSONEncoder
+from randomizer.logic.version import VERSION
+
+GOLDEN_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'golden_patches.json')
+
+# Patch data is hashed in chunks of this many bytes of ROM address space, so a difference can be narrowed down to one
+# chunk without keeping whole patches in the corpus.
+CHUNK_SIZE = 0x1000
+
+
+def random_flags(rng):
+    """Pick a random flag string, turning each flag on or off and picking random choices and options.
+
+    Args:
+        rng (random.Random): Random generator.
+
+    Returns:
+        str: Flag string.
+
+    """
+    flag_strings = []
+    for category in CATEGORIES:
+        for flag in category.flags:
+            if rng.random() < 0.5:
+                continue
+            if flag.value.startswith('-'):
+                flag_strings.append(flag.value)
+                continue
+
+            chars = []
+            if flag.choices:
+                chars.append(rng.choice(flag.choices).value[1:])
+            chars += [option.value[1:] for option in flag.options if rng.random() < 0.5]
+
+            # Flags that begin with @ don't do anything on their own, they need some option enabled.
+            if flag.value.startswith('@'):
+                if chars:
+                    flag_strings.append(flag.value[1:] + ''.join(chars))
+            else:
+                flag_strings.append(flag.value[:1] + ''.join(chars))
+    return ' '.join(flag_strings)
+
+
+def corpus_cases(seeds, combos):
+    """
+    Args:
+        seeds (int): Number of seeds for each preset and mode.
+        combos (int): Number of random flag combinations for each mode, generated with one seed each.
+
+    Returns:
+        list[tuple[str, str, int]]: (mode, flag string, seed) for each case.
+
+    """
+    cases = []
+    for mode in ('linear', 'open'):
+        for preset in PRESETS:
+            cases += [(mode, preset.flags, seed) for seed in range(1, seeds + 1)]
+        rng = random.Random(mode)
+        cases += [(mode, random_flags(rng), i + 1) for i in range(combos)]
+    return cases
+
+
+def chunk_hashes(patch):
+    """
+    Args:
+        patch (randomizer.logic.patch.Patch): Patch.
+
+    Returns:
+        dict[str, str]: Short hash of the patch data starting in each chunk of address space, keyed by the chunk's
+            start address in hex.
+
+    """
+    chunks = {}
+    for addr in sorted(patch.addresses):
+        chunk = chunks.setdefault(addr - addr % CHUNK_SIZE, hashlib.sha1())
+        chunk.update(addr.to_bytes(4, 'little'))
+        chunk.update(bytes(patch.get_data(addr)))
+    return dict(('{:06x}'.format(start), h.hexdigest()[:12]) for start, h in chunks.items())
+
+
+def generate_case(case):
+    """Generate a case and hash its output.  Runs in a worker process.
+
+    Args:
+        case (tuple[str, str, int]): (mode, flag string, seed).
+
+    Returns:
+        dict: Case and its patch, spoiler and chunk hashes, or the error it failed with.
+
+    """
+    mode, flag_string, seed = case
+    result = {'mode': mode, 'flags': flag_string, 'seed': seed}
+    try:
+        world = GameWorld(seed, Settings(mode, flag_string=flag_string))
+        world.randomize()
+        patch = world.build_patch()
+    except Exception as e:
+        # Flag combinations that can't generate for a seed have to keep failing the same way.
+        result['error'] = repr(e)
+        return result
+
+    result['patch'] = hashlib.sha1(json.dumps(patch, cls=PatchJSONEncoder).encode()).hexdigest()
+    result['spoiler'] = hashlib.sha1(
+        json.dumps(world.spoiler, sort_keys=True, cls=PatchJSONEncoder).encode()).hexdigest()
+    result['chunks'] = chunk_hashes(patch)
+    return result
+
+
+def patch_writers(mode, flag_string, seed):
+    """Generate a case again, recording which build_patch phase last wrote each address.
+
+    Args:
+        mode (str): Mode.
+        flag_string (str): Flag string.
+        seed (int): Seed.
+
+    Returns:
+        dict[int, str]: Phase by patch address.
+
+    """
+    world = GameWorld(seed, Settings(mode, flag_string=flag_string))
+    world.randomize()
+
+    writers = {}
+    add_data = Patch.add_data
+
+    def recording_add_data(patch, addr, data):
+        writers[addr] = world.deadline.phase
+        add_data(patch, addr, data)
+
+    Patch.add_data = recording_add_data
+    try:
+        world.build_patch()
+    finally:
+        Patch.add_data = add_data
+    return writers
+
+
+def case_key(case):
+    return '{} {} {!r}'.format(case['mode'], case['seed'], case['flags'])
+
+
+class Command(BaseCommand):
+    help = 'Record or check a corpus of seed patch hashes, to verify that refactors produce identical seeds.'
+
+    def add_arguments(self, parser):
+        """Add optional arguments.
+
+        Args:
+            parser (argparse.ArgumentParser): Parser
+
+        """
+        parser.add_argument('action', choices=['record', 'check'],
+                            help='Record a new corpus, or regenerate the recorded one and compare.')
+
+        parser.add_argument('-c', '--corpus', dest='corpus', default=GOLDEN_FILE,
+                            help='Corpus file.  Default: %(default)s')
+
+        parser.add_argument('-n', '--seeds', dest='seeds', type=int, default=3,
+                            help='When recording, number of seeds for each preset and mode.  Default: %(default)s')
+
+        parser.add_argument('-r', '--random', dest='combos', type=int, default=20,
+                            help='When recording, number of random flag combinations for each mode.  '
+                                 'Default: %(default)s')
+
+        parser.add_argument('-j', '--jobs', dest='jobs', type=int, default=os.cpu_count(),
+                            help='Number of worker processes.  Default: %(default)s')
+
+    def generate(self, cases, jobs):
+        """
+        Args:
+            cases (list[tuple[str, str, int]]): (mode, flag string, seed) for each case.
+            jobs (int): Number of worker processes.
+
+        Returns:
+            list[dict]: Result of each case in the same order.
+
+        """
+        # Every case gets a fresh worker forked from this process, so module level data a seed changes by mistake can't
+        # leak into the next case and make the results depend on their order.
+        with multiprocessing.get_context('fork').Pool(max(jobs, 1), maxtasksperchild=1) as pool:
+            return pool.map(generate_case, cases, chunksize=1)
+
+    def describe_difference(self, expected, actual):
+        """
+        Args:
+            expected (dict): Recorded result.
+            actual (dict): Regenerated result.
+
+        Returns:
+            list[str]: Lines describing how the results differ.
+
+        """
+        if 'error' in expected or 'error' in actual:
+            return ["error {} -> {}".format(expected.get('error'), actual.get('error'))]
+
+        lines = []
+        if expected['spoiler'] != actual['spoiler']:
+            lines.append("spoiler differs")
+
+        chunks = sorted(set(expected['chunks']) | set(actual['chunks']))
+        differing = [c for c in chunks if expected['chunks'].get(c) != actual['chunks'].get(c)]
+        if differing:
+            start = int(differing[0], 16)
+            end = start + CHUNK_SIZE
+            writers = patch_writers(actual['mode'], actual['flags'], actual['seed'])
+            phases = sorted(set(phase for addr, phase in writers.items() if start <= addr < end))
+            lines.append("first differing range {:06x}-{:06x} written by {} ({} of {} chunks differ)".format(
+                start, end - 1, ', '.join(phases) or 'nothing now', len(differing), len(chunks)))
+        return lines
+
+    def handle(self, *args, **options):
+        if options['action'] == 'record':
+            cases = corpus_cases(options['seeds'], options['combos'])
+            results = self.generate(cases, options['jobs'])
+            with open(options['corpus'], 'w') as f:
+                json.dump({'version': VERSION, 'chunk_size': CHUNK_SIZE, 'cases': results}, f, indent=1)
+            self.stdout.write("Recorded {} cases ({} failed) to {}".format(
+                len(results), sum(1 for r in results if 'error' in r), options['corpus']))
+            return
+
+        try:
+            with open(options['corpus']) as f:
+                corpus = json.load(f)
+        except FileNotFoundError:
+            raise CommandError("No corpus at {}, record one first".format(options['corpus']))
+        if corpus['chunk_size'] != CHUNK_SIZE:
+            raise CommandError("Corpus was recorded with a different chunk size, record it again")
+
+        expected = corpus['cases']
+        results = self.generate([(r['mode'], r['flags'], r['seed']) for r in expected], options['jobs'])
+        differences = 0
+        for old, new in zip(expected, results):
+            if old.get('error') == new.get('error') and old.get('patch') == new.get('patch') and \
+                    old.get('spoiler') == new.get('spoiler'):
+                continue
+            differences += 1
+            self.stdout.write(case_key(old))
+            for line in self.describe_difference(old, new):
+                self.stdout.write("    " + line)
+
+        if differences:
+            raise CommandError("{} of {} cases differ from the corpus recorded with version {}".format(
+                differences, len(expected), corpus['version']))
+        self.stdout.write("All {} cases match the corpus".format(len(expected)))
@@ -0,0 +1,86 @@
+import os
+import re
+import subprocess
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+# Modules whose cold import cost matters: web workers load the views, and every management command loads the commands.
+DEFAULT_MODULES = [
+    'randomizer.views',
+    'randomizer.management.commands.cleanseeds',
+    'randomizer.logic.main',
+]
+
+IMPORT_TIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$')
+
+
+def measure_import(module):
+    """Import a module in a fresh interpreter after Django setup and get the import time of each module it loaded.
+
+    Args:
+        module (str): Module to import.
+
+    Returns:
+        list[tuple[str, int, int]]: (module, self microseconds, cumulative microseconds) for each module imported.
+
+    """
+    code = 'import django; django.setup(); import {}'.format(module)
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], env=os.environ.copy(),
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    if result.returncode:
+        raise CommandError("Importing {} failed:\n{}".format(module, result.stderr))
+
+    # Nested imports are reported before the module that imported them, so the target's imports are the lines between
+    # the previous top level import and the target itself.
+    timings = []
+    for line in result.stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if not match:
+            continue
+        name = match.group(4)
+        timings.append((name, int(match.group(1)), int(match.group(2))))
+        if not match.group(3):
+            if name == module:
+                return timings
+            timings = []
+    return timings
+
+
+class Command(BaseCommand):
+    help = 'Report cold import time for the randomizer modules, to catch start up regressions.'
+
+    def add_arguments(self, parser):
+        """Add optional arguments.
+
+        Args:
+            parser (argparse.ArgumentParser): Parser
+
+        """
+        parser.add_argument('modules', nargs='*', default=DEFAULT_MODULES,
+                            help='Modules to import.  Default: {}'.format(' '.join(DEFAULT_MODULES)))
+
+        parser.add_argument('-n', '--top', dest='top', type=int, default=10,
+                            help='Number of most expensive modules to list for each import.  Default: %(default)s')
+
+        parser.add_argument('-m', '--max-ms', dest='max_ms', type=float, default=0,
+                            help='Fail if any import takes longer than this many milliseconds.  0 disables it.')
+
+    def handle(self, *args, **options):
+        over = []
+
+        for module in options['modules']:
+            timings = measure_import(module)
+            total = dict((name, cumulative) for name, own, cumulative in timings).get(module, 0) / 1000.0
+            self.stdout.write("{}: {:.1f} ms".format(module, total))
+
+            expensive = sorted(timings, key=lambda t: t[1], reverse=True)[:options['top']]
+            for name, own, cumulative in expensive:
+                self.stdout.write("    {:8.1f} ms self {:8.1f} ms cumulative  {}".format(own / 1000.0,
+                                                                                        cumulative / 1000.0, name))
+
+            if options['max_ms'] and total > options['max_ms']:
+                over.append(module)
+
+        if over:
+            raise CommandError("Imports over {:g} ms: {}".format(options['max_ms'], ', '.join(over)))
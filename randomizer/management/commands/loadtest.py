@@ -0,0 +1,217 @@
+import collections
+import http.cookiejar
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from django.core.management.base import BaseCommand, CommandError
+
+from .benchseeds import PERCENTILES, percentile
+from randomizer.logic.flags import PRESETS
+
+# Relative weight of each endpoint in the default request mix.
+DEFAULT_MIX = 'seed=2,api=1,permalink=4,page=3'
+PAGES = ['/', '/randomize', '/options', '/how-to-play', '/resources']
+
+# Permalink fetches pick from this many of the newest seeds most of the time, and from any known seed otherwise.
+HOT_SEEDS = 10
+HOT_CHANCE = 0.8
+
+
+def parse_mix(value):
+    """
+    Args:
+        value (str): Comma separated endpoint=weight pairs.
+
+    Returns:
+        dict[str, float]: Weight by endpoint.
+
+    """
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        if name not in ('seed', 'api', 'permalink', 'page'):
+            raise CommandError("Unknown endpoint {!r} in request mix".format(name))
+        mix[name] = float(weight or 1)
+    if mix.get('permalink') and not (mix.get('seed') or mix.get('api')):
+        raise CommandError("Permalink requests need seed or api requests in the mix to generate seeds to fetch")
+    return mix
+
+
+class LoadTest:
+    """Request mix replayed against a running server by a number of client threads."""
+
+    def __init__(self, url, mix, timeout):
+        """
+
+        Args:
+            url (str): Base URL of the server.
+            mix (dict[str, float]): Weight by endpoint.
+            timeout (float): Request timeout in seconds.
+
+        """
+        self.url = url.rstrip('/')
+        self.mix = mix
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.samples = collections.defaultdict(list)
+        self.errors = collections.Counter()
+        self.hashes = []
+
+    def request(self, opener, path, data=None, headers=None):
+        """
+        Args:
+            opener (urllib.request.OpenerDirector): Client with its own cookies.
+            path (str): Path to request.
+            data (bytes): POST body, or None for a GET.
+            headers (dict[str, str]): Extra request headers.
+
+        Returns:
+            bytes: Response body.
+
+        """
+        req = urllib.request.Request(self.url + path, data=data, headers=headers or {})
+        with opener.open(req, timeout=self.timeout) as response:
+            return response.read()
+
+    def _remember_hash(self, body):
+        result = json.loads(body)
+        if 'hash' not in result:
+            raise ValueError(result.get('error', 'No hash in response'))
+        with self.lock:
+            self.hashes.append(result['hash'])
+
+    def seed(self, opener, rng, cookies):
+        """Post the randomize form with a preset, like the site does."""
+        if not any(c.name == 'csrftoken' for c in cookies):
+            self.request(opener, '/randomize')
+        token = next(c.value for c in cookies if c.name == 'csrftoken')
+        data = urllib.parse.urlencode({
+            'mode': rng.choice(['open', 'linear']),
+            'flags': rng.choice(PRESETS).flags,
+            'csrfmiddlewaretoken': token,
+        }).encode()
+        self._remember_hash(self.request(opener, '/seed', data, {'Referer': self.url + '/randomize'}))
+
+    def api(self, opener, rng, cookies):
+        """Generate a seed with a preset through the JSON API."""
+        data = json.dumps({'mode': rng.choice(['open', 'linear']), 'flags': rng.choice(PRESETS).flags}).encode()
+        self._remember_hash(self.request(opener, '/api/v1/generate', data, {'Content-Type': 'application/json'}))
+
+    def permalink(self, opener, rng, cookies):
+        """Fetch a seed generated earlier in the run, mostly recent ones."""
+        with self.lock:
+            if rng.random() < HOT_CHANCE:
+                seed_hash = rng.choice(self.hashes[-HOT_SEEDS:])
+            else:
+                seed_hash = rng.choice(self.hashes)
+        json.loads(self.request(opener, '/hash/{}/US'.format(seed_hash)))
+
+    def page(self, opener, rng, cookies):
+        """Fetch a static page."""
+        self.request(opener, rng.choice(PAGES))
+
+    def client(self, index, stop_at):
+        """Run one client thread until the given time.
+
+        Args:
+            index (int): Client number, used to seed its choices.
+            stop_at (float): perf_counter time to stop at.
+
+        """
+        rng = random.Random(index)
+        cookies = http.cookiejar.CookieJar()
+        opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(cookies))
+        names = list(self.mix)
+        weights = [self.mix[n] for n in names]
+        # Permalinks can't be fetched until some seed has been generated, so pick from the rest of the mix until then.
+        other_names = [n for n in names if n != 'permalink']
+        other_weights = [self.mix[n] for n in other_names]
+
+        while time.perf_counter() < stop_at:
+            if self.hashes:
+                name = rng.choices(names, weights)[0]
+            else:
+                name = rng.choices(other_names, other_weights)[0]
+            start = time.perf_counter()
+            try:
+                getattr(self, name)(opener, rng, cookies)
+            except (urllib.error.URLError, OSError, ValueError, StopIteration) as e:
+                with self.lock:
+                    self.errors[(name, type(e).__name__ if not isinstance(e, urllib.error.HTTPError) else
+                                 'HTTP {}'.format(e.code))] += 1
+                    self.samples[name].append(None)
+                continue
+            elapsed = time.perf_counter() - start
+            with self.lock:
+                self.samples[name].append(elapsed)
+
+    def run(self, concurrency, duration):
+        """
+        Args:
+            concurrency (int): Number of client threads.
+            duration (float): Seconds to run for.
+
+        Returns:
+            float: Seconds actually elapsed.
+
+        """
+        start = time.perf_counter()
+        threads = [threading.Thread(target=self.client, args=(i, start + duration), daemon=True)
+                   for i in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - start
+
+
+class Command(BaseCommand):
+    help = 'Load test a running server with a realistic mix of seed generation, permalink and page requests.'
+
+    def add_arguments(self, parser):
+        """Add optional arguments.
+
+        Args:
+            parser (argparse.ArgumentParser): Parser
+
+        """
+        parser.add_argument('-u', '--url', dest='url', default='http://127.0.0.1:8000',
+                            help='Base URL of the server.  Default: %(default)s')
+
+        parser.add_argument('-c', '--concurrency', dest='concurrency', type=int, default=4,
+                            help='Number of concurrent clients.  Default: %(default)s')
+
+        parser.add_argument('-d', '--duration', dest='duration', type=float, default=60,
+                            help='Seconds to run for.  Default: %(default)s')
+
+        parser.add_argument('-x', '--mix', dest='mix', default=DEFAULT_MIX,
+                            help='Relative weight of each endpoint (seed, api, permalink, page).  '
+                                 'Default: %(default)s')
+
+        parser.add_argument('--timeout', dest='timeout', type=float, default=60,
+                            help='Request timeout in seconds.  Default: %(default)s')
+
+    def handle(self, *args, **options):
+        test = LoadTest(options['url'], parse_mix(options['mix']), options['timeout'])
+        self.stdout.write("Running {} clients against {} for {:g}s".format(
+            options['concurrency'], options['url'], options['duration']))
+        elapsed = test.run(options['concurrency'], options['duration'])
+
+        self.stdout.write("{:10} {:>8} {:>9} {:>8}  ".format('endpoint', 'requests', 'req/sec', 'errors') +
+                          '  '.join("{:>8}".format('p{}'.format(pct)) for pct in PERCENTILES))
+        for name in test.mix:
+            samples = test.samples.get(name, [])
+            times = [s for s in samples if s is not None]
+            errors = len(samples) - len(times)
+            self.stdout.write("{:10} {:>8} {:>9.2f} {:>7.1%}  ".format(
+                name, len(samples), len(samples) / elapsed, errors / len(samples) if samples else 0) + '  '.join(
+                "{:>5.0f} ms".format(percentile(times, pct) * 1000) if times else "{:>8}".format('-')
+                for pct in PERCENTILES))
+
+        for (name, error), count in sorted(test.errors.items()):
+            self.stdout.write("{} errors: {} x {}".format(name, count, error))
@@ -4,6 +4,7 @@ import random
 from django.core.management.base import BaseCommand
 from .generatesample import ALL_FLAGS
 
+from randomizer.logic import utils
 from randomizer.logic.main import GameWorld, Settings
 
 
@@ -33,8 +34,12 @@ class Command(BaseCommand):
         parser.add_argument('-f', '--flags', dest='flags', default=ALL_FLAGS,
                             help='Flags string (from website). If not provided, all flags will be used.')
 
+        parser.add_argument('--stat-mutation', dest='stat_mutation', default=utils.STAT_MUTATION_LEGACY,
+                            choices=utils.STAT_MUTATIONS,
+                            help='Stat mutation generator.  Batch generators need NumPy.  Default: %(default)s')
+
     def handle(self, *args, **options):
-        settings = Settings(options['mode'], flag_string=options['flags'])
+        settings = Settings(options['mode'], flag_string=options['flags'], stat_mutation=options['stat_mutation'])
         seed = options['seed']
 
         # If seed is not provided, generate a 32 bit seed integer using the CSPRNG.
@@ -0,0 +1,88 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from randomizer.logic.deadline import Deadline
+from randomizer.logic.flags import FlagError
+from randomizer.logic.main import GameWorld, Settings
+from randomizer.logic.utils import gc_paused
+from randomizer.logic.version import VERSION
+from randomizer.models import SlowSeed
+from randomizer.profiling import Sampler, write_profile
+
+
+class Command(BaseCommand):
+    help = 'Regenerate recorded slow seeds under the profiler, comparing their phase timings with the recorded ones.'
+
+    def add_arguments(self, parser):
+        """Add optional arguments.
+
+        Args:
+            parser (argparse.ArgumentParser): Parser
+
+        """
+        parser.add_argument('ids', nargs='*', type=int,
+                            help='IDs of the slow seeds to replay.  Default: the newest ones.')
+
+        parser.add_argument('-n', '--latest', dest='latest', type=int, default=10,
+                            help='Number of the newest slow seeds to replay if no IDs are given.  Default: %(default)s')
+
+        parser.add_argument('-o', '--output', dest='output', default=settings.PROFILE_DIR,
+                            help='Directory to write collapsed stack profiles to.  Default: %(default)s')
+
+        parser.add_argument('-i', '--interval', dest='interval', type=float, default=settings.PROFILE_INTERVAL,
+                            help='Seconds between profiler samples.  Default: %(default)s')
+
+        parser.add_argument('-p', '--phases', dest='phases', type=int, default=10,
+                            help='Number of the slowest phases to show for each seed.  Default: %(default)s')
+
+    def replay(self, slow, options):
+        """Regenerate a slow seed and print how its timings compare.
+
+        Args:
+            slow (randomizer.models.SlowSeed): Slow seed.
+            options (dict): Command options.
+
+        """
+        self.stdout.write("#{} seed {} {} {!r}, version {}{}: {:.2f}s{}".format(
+            slow.pk, slow.seed, slow.mode, slow.flags, slow.version,
+            '' if slow.version == VERSION else ' (now {})'.format(VERSION), slow.seconds,
+            ', timed out in {}'.format(slow.timings[-1][0]) if slow.timed_out and slow.timings else ''))
+
+        # Same as the generate view: the deadline starts before the world is built, but without a time limit.
+        deadline = Deadline()
+        sampler = Sampler(options['interval'])
+        sampler.start()
+        try:
+            world = GameWorld(slow.seed, Settings(slow.mode, slow.debug_mode, slow.flags), deadline=deadline)
+            with gc_paused():
+                world.randomize()
+                world.build_patch()
+        except FlagError as e:
+            self.stdout.write("    flag error: {}".format(e.args[0]))
+        finally:
+            sampler.stop()
+
+        timings = deadline.finish()
+        recorded = dict((phase, seconds) for phase, seconds, blocks in slow.timings)
+        self.stdout.write("    replayed in {:.2f}s".format(sum(seconds for phase, seconds, blocks in timings)))
+        for phase, seconds, blocks in sorted(timings, key=lambda t: -t[1])[:options['phases']]:
+            self.stdout.write("    {:36} {:>10.1f} ms  recorded {:>10} ms".format(
+                phase, seconds * 1000, '{:.1f}'.format(recorded[phase] * 1000) if phase in recorded else '-'))
+
+        path = write_profile(sampler, options['output'], slow.seed, slow.mode, slow.flags)
+        self.stdout.write("    profile: {}".format(path))
+
+    def handle(self, *args, **options):
+        if options['ids']:
+            slow_seeds = list(SlowSeed.objects.filter(pk__in=options['ids']).order_by('pk'))
+            missing = set(options['ids']) - set(s.pk for s in slow_seeds)
+            if missing:
+                raise CommandError("No slow seeds with IDs {}".format(', '.join(str(i) for i in sorted(missing))))
+        else:
+            slow_seeds = list(SlowSeed.objects.order_by('-pk')[:options['latest']])
+            if not slow_seeds:
+                self.stdout.write("No slow seeds recorded")
+                return
+
+        for slow in slow_seeds:
+            self.replay(slow, options)
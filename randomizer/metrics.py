@@ -0,0 +1,247 @@
+# Prometheus metrics for seed generation.  Each process keeps its own totals and, when METRICS_DIR is set, also writes
+# them to its own file in that directory, so the metrics view can add up all the gunicorn workers without any locking
+# between processes.
+
+import contextlib
+import glob
+import json
+import os
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+
+SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BLOCKS_BUCKETS = (100, 1000, 10000, 100000, 1000000)
+
+# Histogram name: (help text, bucket upper bounds).
+HISTOGRAMS = {
+    'smrpg_generation_phase_seconds': ('Wall time of each seed generation phase.', SECONDS_BUCKETS),
+    'smrpg_generation_phase_allocated_blocks': ('Net memory blocks allocated by each seed generation phase.',
+                                                BLOCKS_BUCKETS),
+}
+# Counter name: help text.  These count randomization steps by the same labels, with the phase being the step's
+# deadline phase name.
+COUNTERS = {
+    'smrpg_generation_step_failures_total': 'Randomization step attempts whose logic failed.',
+    'smrpg_generation_step_retries_total': 'Randomization steps run again with a derived seed after a failure.',
+}
+LABELS = ('mode', 'preset', 'phase')
+
+_lock = threading.Lock()
+_series = None
+_preset_names = {}
+
+
+def preset_name(mode, flag_string):
+    """
+    Args:
+        mode (str): Mode.
+        flag_string (str): Normalized flag string from the generation settings.
+
+    Returns:
+        str: Name of the preset these flags match, or 'custom'.
+    """
+    if mode not in _preset_names:
+        from .logic.flags import PRESETS
+        from .logic.main import Settings
+        _preset_names[mode] = dict((Settings(mode, flag_string=p.flags).flag_string, p.name) for p in PRESETS)
+    return _preset_names[mode].get(flag_string, 'custom')
+
+
+def _process_file():
+    return os.path.join(settings.METRICS_DIR, 'generation-{}.json'.format(os.getpid()))
+
+
+def _read_series(path):
+    """
+    Args:
+        path (str): Metrics file.
+
+    Returns:
+        dict[tuple, list]: Series keyed by (name, mode, preset, phase).  Histograms are a list of the count in each
+            bucket plus the overflow bucket, then the sum and total count, and counters are a list of just the count.
+    """
+    with open(path) as f:
+        return dict((tuple(key), value) for key, value in json.load(f))
+
+
+def _get_series():
+    global _series
+    if _series is None:
+        _series = {}
+        # A new worker can get the pid of one that exited, so carry on from its totals rather than replacing them.
+        if settings.METRICS_DIR and os.path.exists(_process_file()):
+            _series = _read_series(_process_file())
+    return _series
+
+
+def _write_series(series):
+    os.makedirs(settings.METRICS_DIR, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=settings.METRICS_DIR, suffix='.tmp')
+    with os.fdopen(fd, 'w') as f:
+        json.dump([[list(key), value] for key, value in series.items()], f)
+    os.replace(tmp, _process_file())
+
+
+def _observe(series, name, labels, value):
+    buckets = HISTOGRAMS[name][1]
+    values = series.get((name,) + labels)
+    if values is None:
+        values = series[(name,) + labels] = [0] * (len(buckets) + 1) + [0, 0]
+    index = next((i for i, bound in enumerate(buckets) if value <= bound), len(buckets))
+    values[index] += 1
+    values[-2] += value
+    values[-1] += 1
+
+
+def _increment(series, name, labels, value):
+    values = series.setdefault((name,) + labels, [0])
+    values[0] += value
+
+
+def observe_generation(mode, flag_string, timings, step_stats=None):
+    """Record the phase timings of a generated seed.
+
+    Args:
+        mode (str): Mode.
+        flag_string (str): Normalized flag string from the generation settings.
+        timings (list[tuple[str, float, int]]): (phase, seconds, net allocated blocks) for each phase, from
+            Deadline.finish.
+        step_stats (dict[str, dict[str, int]]): Failure and retry counts by randomization step name, from
+            GameWorld.subsystem_stats.
+
+    """
+    preset = preset_name(mode, flag_string)
+    total_seconds = sum(seconds for phase, seconds, blocks in timings)
+    total_blocks = sum(blocks for phase, seconds, blocks in timings)
+
+    with _lock:
+        series = _get_series()
+        for phase, seconds, blocks in timings + [('total', total_seconds, total_blocks)]:
+            _observe(series, 'smrpg_generation_phase_seconds', (mode, preset, phase), seconds)
+            # Phases that free more than they allocate count as zero.
+            _observe(series, 'smrpg_generation_phase_allocated_blocks', (mode, preset, phase), max(blocks, 0))
+        for step, stats in (step_stats or {}).items():
+            labels = (mode, preset, 'randomize ' + step)
+            _increment(series, 'smrpg_generation_step_failures_total', labels, stats['failures'])
+            _increment(series, 'smrpg_generation_step_retries_total', labels, stats['retries'])
+        if settings.METRICS_DIR:
+            _write_series(series)
+
+
+def collect():
+    """
+    Returns:
+        dict[tuple, list]: Histogram series added up over every process writing to METRICS_DIR, or for this process
+            only if it isn't set.
+    """
+    if not settings.METRICS_DIR:
+        with _lock:
+            return dict((key, list(values)) for key, values in _get_series().items())
+
+    totals = {}
+    for path in glob.glob(os.path.join(settings.METRICS_DIR, 'generation-*.json')):
+        try:
+            series = _read_series(path)
+        except (OSError, ValueError):
+            # A file can disappear if the directory is being cleared.
+            continue
+        for key, values in series.items():
+            if key in totals:
+                totals[key] = [a + b for a, b in zip(totals[key], values)]
+            else:
+                totals[key] = values
+    return totals
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render():
+    """
+    Returns:
+        str: All generation metrics in the Prometheus text exposition format.
+    """
+    series = collect()
+    lines = []
+    for name, (help_text, buckets) in HISTOGRAMS.items():
+        lines.append('# HELP {} {}'.format(name, help_text))
+        lines.append('# TYPE {} histogram'.format(name))
+        for key in sorted(k for k in series if k[0] == name):
+            values = series[key]
+            labels = ','.join('{}="{}"'.format(label, _escape(value)) for label, value in zip(LABELS, key[1:]))
+            cumulative = 0
+            for bound, count in zip(['{:g}'.format(b) for b in buckets] + ['+Inf'], values[:-2]):
+                cumulative += count
+                lines.append('{}_bucket{{{},le="{}"}} {}'.format(name, labels, bound, cumulative))
+            lines.append('{}_sum{{{}}} {}'.format(name, labels, values[-2]))
+            lines.append('{}_count{{{}}} {}'.format(name, labels, values[-1]))
+    for name, help_text in COUNTERS.items():
+        lines.append('# HELP {} {}'.format(name, help_text))
+        lines.append('# TYPE {} counter'.format(name))
+        for key in sorted(k for k in series if k[0] == name):
+            labels = ','.join('{}="{}"'.format(label, _escape(value)) for label, value in zip(LABELS, key[1:]))
+            lines.append('{}{{{}}} {}'.format(name, labels, series[key][0]))
+    return '\n'.join(lines) + '\n'
+
+
+class ServerTiming:
+    """Durations of the steps of handling a request, for the Server-Timing response header so they show up in browser
+    dev tools and proxy logs.
+    """
+
+    def __init__(self):
+        self._entries = {}
+
+    def add(self, name, seconds, description):
+        """Add time to a step.  Time added to the same step more than once is combined.
+
+        Args:
+            name (str): Short metric name for the header.
+            seconds (float): Duration in seconds.
+            description (str): Human readable description.
+
+        """
+        entry = self._entries.setdefault(name, [0.0, description])
+        entry[0] += seconds
+
+    @contextlib.contextmanager
+    def measure(self, name, description):
+        """Context manager that adds the time spent in the block to a step.
+
+        Args:
+            name (str): Short metric name for the header.
+            description (str): Human readable description.
+
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start, description)
+
+    @property
+    def header(self):
+        """
+        Returns:
+            str: Server-Timing header value, durations in milliseconds.
+        """
+        return ', '.join('{};dur={:.1f};desc="{}"'.format(name, seconds * 1000, description)
+                         for name, (seconds, description) in self._entries.items())
+
+    def apply(self, response):
+        """Set the Server-Timing header on a response.
+
+        Args:
+            response (django.http.HttpResponse): Response.
+
+        Returns:
+            django.http.HttpResponse: The same response.
+
+        """
+        if self._entries:
+            response['Server-Timing'] = self.header
+        return response
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-19 10:48
+
+import jsonfield.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('randomizer', '0008_race_mode_spoiler'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowSeed',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('generated', models.DateTimeField(auto_now_add=True)),
+                ('seed', models.BigIntegerField()),
+                ('version', models.CharField(max_length=16)),
+                ('mode', models.CharField(max_length=16)),
+                ('debug_mode', models.BooleanField(default=False)),
+                ('flags', models.TextField(default='')),
+                ('seconds', models.FloatField()),
+                ('timed_out', models.BooleanField(default=False)),
+                ('timings', jsonfield.fields.JSONField(default=[])),
+            ],
+        ),
+    ]
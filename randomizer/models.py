@@ -26,3 +26,16 @@ class Patch(models.Model):
         unique_together = [
             ('seed', 'region'),
         ]
+
+
+class SlowSeed(models.Model):
+    """Seed that took longer than the slow seed threshold to generate, kept so it can be replayed with replayslow."""
+    generated = models.DateTimeField(auto_now_add=True)
+    seed = models.BigIntegerField()
+    version = models.CharField(max_length=16)
+    mode = models.CharField(max_length=16)
+    debug_mode = models.BooleanField(default=False)
+    flags = models.TextField(default='')
+    seconds = models.FloatField()
+    timed_out = models.BooleanField(default=False)
+    timings = JSONField(default=[])
@@ -0,0 +1,153 @@
+# Built-in statistical profiler for seed generation, since external profilers can't easily be attached inside the
+# production container.  A background thread samples the stack of the generating thread and the samples are written as
+# collapsed stacks, one file per request, which flamegraph.pl, speedscope and similar tools read directly.
+
+import collections
+import contextlib
+import datetime
+import logging
+import os
+import random
+import re
+import sys
+import threading
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Request header that staff users can send to profile a single request regardless of the sample rate.
+PROFILE_HEADER = 'X-Profile'
+
+# Separate generator for the sampling decision, so it never touches the global random state the randomizer uses.
+_sampling_random = random.Random()
+
+
+class Sampler:
+    """Background thread that periodically samples the stack of another thread."""
+
+    def __init__(self, interval, thread_id=None):
+        """
+
+        Args:
+            interval (float): Seconds between samples.
+            thread_id (int): Identifier of the thread to sample.  Defaults to the current thread.
+
+        """
+        self.interval = interval
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.stacks = collections.Counter()
+        self._labels = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            filename = code.co_filename
+            if filename.startswith(settings.BASE_DIR):
+                filename = os.path.relpath(filename, settings.BASE_DIR)
+            else:
+                filename = os.path.basename(filename)
+            label = self._labels[code] = '{} ({}:{})'.format(code.co_qualname, filename, code.co_firstlineno)
+        return label
+
+    def sample(self):
+        """Record the current stack of the sampled thread, if it's still running."""
+        frame = sys._current_frames().get(self.thread_id)
+        stack = []
+        while frame is not None:
+            stack.append(self._label(frame.f_code))
+            frame = frame.f_back
+        if stack:
+            self.stacks[tuple(reversed(stack))] += 1
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self, root=None):
+        """
+        Args:
+            root (str): Optional frame to put at the bottom of every stack, i.e. to tag the profile.
+
+        Returns:
+            str: Samples in the collapsed stack format, one "frame;frame;frame count" line per distinct stack.
+
+        """
+        prefix = (root.replace(';', ','),) if root else ()
+        return ''.join('{} {}\n'.format(';'.join(prefix + stack), count) for stack, count in self.stacks.items())
+
+
+def should_profile(request):
+    """
+    Args:
+        request (django.http.HttpRequest): Request.
+
+    Returns:
+        bool: True if this request should be profiled, either because a staff user asked for it with the profile
+            header or because it was picked at the configured sample rate.
+    """
+    if request.headers.get(PROFILE_HEADER) and request.user.is_staff:
+        return True
+    return _sampling_random.random() < settings.PROFILE_SAMPLE_RATE
+
+
+def write_profile(sampler, directory, seed, mode, flag_string):
+    """Write the samples of a generated seed to a collapsed stack file tagged with the seed, mode and flags.
+
+    Args:
+        sampler (Sampler): Stopped sampler.
+        directory (str): Directory to write to.
+        seed (int): Seed.
+        mode (str): Mode.
+        flag_string (str): Flag string.
+
+    Returns:
+        str: Path of the file.
+
+    """
+    name = '{:%Y%m%d-%H%M%S-%f}-{}-{}-{}.folded'.format(
+        datetime.datetime.now(), seed, mode, re.sub(r'[^A-Za-z0-9]+', '_', flag_string).strip('_')[:100])
+    path = os.path.join(directory, name)
+    os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(sampler.collapsed('seed {} {} {}'.format(seed, mode, flag_string)))
+    return path
+
+
+@contextlib.contextmanager
+def profile_request(request, seed, mode, flag_string):
+    """Context manager that profiles the block if the request should be profiled, writing the collapsed stacks to
+    PROFILE_DIR when it exits, even if it raised.
+
+    Args:
+        request (django.http.HttpRequest): Request.
+        seed (int): Seed being generated.
+        mode (str): Mode.
+        flag_string (str): Flag string.
+
+    """
+    if not should_profile(request):
+        yield
+        return
+
+    sampler = Sampler(settings.PROFILE_INTERVAL)
+    sampler.start()
+    try:
+        yield
+    finally:
+        sampler.stop()
+        try:
+            write_profile(sampler, settings.PROFILE_DIR, seed, mode, flag_string)
+        except OSError:
+            # Never fail the request over a profile.
+            logger.exception("Could not write profile to {}".format(settings.PROFILE_DIR))
@@ -0,0 +1,48 @@
+# Record of seeds that took too long to generate, so the replayslow command can reproduce them.  The table is kept
+# bounded to the newest SLOW_SEED_LIMIT seeds.
+
+import logging
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+
+from .models import SlowSeed
+
+logger = logging.getLogger(__name__)
+
+
+def record_slow_seed(seed, mode, debug_mode, flag_string, version, timings, timed_out=False):
+    """Record a seed that took longer than SLOW_SEED_THRESHOLD to generate, or timed out, so it can be replayed.  Only
+    the newest SLOW_SEED_LIMIT slow seeds are kept.
+
+    Args:
+        seed (int): Seed.
+        mode (str): Mode.
+        debug_mode (bool): Debug mode.
+        flag_string (str): Normalized flag string from the generation settings.
+        version (str): Randomizer version.
+        timings (list[tuple[str, float, int]]): (phase, seconds, net allocated blocks) for each phase, from
+            Deadline.finish.
+        timed_out (bool): True if generation gave up at the deadline.
+
+    Returns:
+        randomizer.models.SlowSeed: The recorded seed, or None if it wasn't slow.
+
+    """
+    seconds = sum(s for phase, s, blocks in timings)
+    if not settings.SLOW_SEED_THRESHOLD or (seconds < settings.SLOW_SEED_THRESHOLD and not timed_out):
+        return None
+
+    try:
+        with transaction.atomic():
+            slow = SlowSeed.objects.create(seed=seed, mode=mode, debug_mode=debug_mode, flags=flag_string,
+                                           version=version, seconds=seconds, timed_out=timed_out,
+                                           timings=[list(t) for t in timings])
+            stale = SlowSeed.objects.order_by('-id').values_list('id', flat=True)[settings.SLOW_SEED_LIMIT:][:1]
+            if stale:
+                SlowSeed.objects.filter(id__lte=stale[0]).delete()
+    except DatabaseError:
+        # Never fail the request over a diagnostic record.
+        logger.exception("Could not record slow seed {} {} {!r}".format(seed, mode, flag_string))
+        return None
+    return slow
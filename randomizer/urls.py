@@ -26,4 +26,7 @@ urlpatterns = [
     # API
     path('api/v1/generate', views.APIGenerateView.as_view(), name='api-v1-generate'),
     path('api/v1/flags', views.APIFlags.as_view(), name='api-v1-flags'),
+
+    # Monitoring
+    path('metrics', views.MetricsView.as_view(), name='metrics'),
 ]
@@ -1,5 +1,6 @@
 import binascii
 import hashlib
+import hmac
 import json
 import logging
 import os
@@ -8,22 +9,22 @@ import string
 import tempfile
 import shutil
 
-import Wii
-import nlzss
-
 from django.conf import settings
 from django.db import transaction
-from django.http import JsonResponse, HttpResponseBadRequest, HttpResponse, HttpResponseNotFound, QueryDict
+from django.http import (JsonResponse, HttpResponseBadRequest, HttpResponse, HttpResponseForbidden,
+                         HttpResponseNotFound, QueryDict)
 from django.urls import reverse
 from django.utils.decorators import method_decorator
 from django.views import View
 from django.views.decorators.csrf import csrf_exempt
 from django.views.generic import TemplateView, FormView
 
+from . import metrics, profiling, slowseeds
 from .models import Seed, Patch
 from .forms import GenerateForm
+from .logic.deadline import Deadline, GenerationTimeout
 from .logic.flags import CATEGORIES, PRESETS, FlagError
-from .logic.main import GameWorld, Settings, VERSION
+from .logic.version import VERSION
 from .logic.patch import PatchJSONEncoder
 
 # Get an instance of a logger
@@ -148,21 +149,42 @@ class GenerateView(FormView):
         debug_mode = bool(data['debug_mode'])
         race_mode = bool(data['race_mode'])
 
-        # Build game world, randomize it, and generate the patch.
-        world = GameWorld(seed, Settings(mode, debug_mode, data['flags'] or ''))
-
-        try:
-            world.randomize()
-            patches = {'US': world.build_patch()}
-        except FlagError as e:
-            # Catch error with flags and return that error message instead.
-            result = {
-                'error': e.args[0],
-            }
-            return JsonResponse(result, encoder=PatchJSONEncoder)
-        except Exception:
-            logger.error("ERROR form data: {!r}, generated seed: {!r}".format(data, seed))
-            raise
+        # Build game world, randomize it, and generate the patch.  The randomizer logic and data modules are imported on
+        # the first generation rather than at startup, to keep worker and manage.py cold starts fast.
+        from .logic.main import GameWorld, Settings
+        from .logic.utils import gc_paused
+        timing = metrics.ServerTiming()
+        deadline = Deadline(settings.GENERATION_TIMEOUT or None)
+        with profiling.profile_request(self.request, seed, mode, data['flags'] or ''):
+            try:
+                world_settings = Settings(mode, debug_mode, data['flags'] or '')
+                with timing.measure('world', 'World construction'):
+                    world = GameWorld(seed, world_settings, deadline=deadline)
+                with gc_paused():
+                    with timing.measure('randomize', 'Randomize'):
+                        world.randomize()
+                    with timing.measure('build_patch', 'Build patch'):
+                        patches = {'US': world.build_patch()}
+            except FlagError as e:
+                # Catch error with flags and return that error message instead.
+                result = {
+                    'error': e.args[0],
+                }
+                return timing.apply(JsonResponse(result, encoder=PatchJSONEncoder))
+            except GenerationTimeout as e:
+                # Give up cleanly before saving anything, and report which phase ran over.
+                logger.warning("Generation timed out in {} after {:.2f}s, form data: {!r}, generated seed: {!r}".format(
+                    e.phase, e.elapsed, data, seed))
+                slowseeds.record_slow_seed(seed, mode, debug_mode, world_settings.flag_string, VERSION,
+                                           deadline.finish(), timed_out=True)
+                return timing.apply(JsonResponse(e.as_dict(), status=503))
+            except Exception:
+                logger.error("ERROR form data: {!r}, generated seed: {!r}".format(data, seed))
+                raise
+
+        timings = deadline.finish()
+        metrics.observe_generation(mode, world.settings.flag_string, timings, world.subsystem_stats)
+        slowseeds.record_slow_seed(seed, mode, debug_mode, world.settings.flag_string, VERSION, timings)
 
         # Send back patch data.
         result = {
@@ -179,8 +201,11 @@ class GenerateView(FormView):
             'spoiler': world.spoiler if not race_mode else {},
         }
 
+        with timing.measure('serialize', 'Serialization'):
+            patch_dumps = dict((region, json.dumps(patch, cls=PatchJSONEncoder)) for region, patch in patches.items())
+
         # Save patch to the database (don't need to save EU since it's the same as US).
-        with transaction.atomic():
+        with timing.measure('db', 'DB transaction'), transaction.atomic():
             # If there's an existing seed with the same hash, replace it.
             try:
                 s = Seed.objects.get(hash=world.hash)
@@ -194,8 +219,7 @@ class GenerateView(FormView):
                      file_select_hash=world.file_select_hash, race_mode=race_mode, spoiler=world.spoiler)
             s.save()
 
-            for region, patch in patches.items():
-                patch_dump = json.dumps(patch, cls=PatchJSONEncoder)
+            for region, patch_dump in patch_dumps.items():
                 h = hashlib.sha1()
                 h.update(patch_dump.encode())
                 p = Patch(seed=s, region=region, sha1=h.hexdigest(), patch=patch_dump)
@@ -205,7 +229,9 @@ class GenerateView(FormView):
         if self.return_patch_data:
             result['patch'] = patches['US']  # Patch for EU version is the same as US.
 
-        return JsonResponse(result, encoder=PatchJSONEncoder)
+        with timing.measure('serialize', 'Serialization'):
+            response = JsonResponse(result, encoder=PatchJSONEncoder)
+        return timing.apply(response)
 
     def form_invalid(self, form):
         msg = "{} form error: ".format(self.__class__.__name__) + '; '.join(form.errors)
@@ -227,30 +253,34 @@ class GenerateFromHashView(View):
         if region == 'EU':
             region = 'US'
 
-        try:
-            s = Seed.objects.get(hash=hash)
-        except Seed.DoesNotExist:
-            return HttpResponseNotFound("No record for hash {0!r}".format(hash))
+        timing = metrics.ServerTiming()
+        with timing.measure('db', 'DB queries'):
+            try:
+                s = Seed.objects.get(hash=hash)
+            except Seed.DoesNotExist:
+                return HttpResponseNotFound("No record for hash {0!r}".format(hash))
 
-        try:
-            p = Patch.objects.get(seed=s, region=region)
-        except Patch.DoesNotExist:
-            return HttpResponseNotFound("No patch found for hash {0!r}, region {1!r}".format(hash, region))
+            try:
+                p = Patch.objects.get(seed=s, region=region)
+            except Patch.DoesNotExist:
+                return HttpResponseNotFound("No patch found for hash {0!r}, region {1!r}".format(hash, region))
 
-        result = {
-            'logic': s.version,
-            'seed': s.seed,
-            'hash': s.hash,
-            'mode': s.mode,
-            'debug_mode': s.debug_mode,
-            'flag_string': s.flags,
-            'file_select_character': s.file_select_char,
-            'file_select_hash': s.file_select_hash,
-            'patch': json.loads(p.patch),
-            'race_mode': s.race_mode,
-            'spoiler': s.spoiler if not s.race_mode else {},
-        }
-        return JsonResponse(result)
+        with timing.measure('serialize', 'Serialization'):
+            result = {
+                'logic': s.version,
+                'seed': s.seed,
+                'hash': s.hash,
+                'mode': s.mode,
+                'debug_mode': s.debug_mode,
+                'flag_string': s.flags,
+                'file_select_character': s.file_select_char,
+                'file_select_hash': s.file_select_hash,
+                'patch': json.loads(p.patch),
+                'race_mode': s.race_mode,
+                'spoiler': s.spoiler if not s.race_mode else {},
+            }
+            response = JsonResponse(result)
+        return timing.apply(response)
 
 
 @method_decorator(csrf_exempt, name='dispatch')
@@ -258,11 +288,16 @@ class PackingView(View):
     @staticmethod
     def post(request):
         """Pack uploaded ROM into the provided WAD file as downloaded file."""
+        # The WAD packing libraries are slow to import and only needed here, so don't load them at startup.
+        import Wii
+        import nlzss
+
         if not request.FILES.get('rom'):
             return HttpResponseBadRequest("ROM file not provided")
         elif not request.FILES.get('wad'):
             return HttpResponseBadRequest("WAD file not provided")
 
+        timing = metrics.ServerTiming()
         with tempfile.TemporaryDirectory() as dumpdir:
             romfile = os.path.join(dumpdir, 'rom.sfc')
             with open(romfile, 'wb') as f:
@@ -272,18 +307,20 @@ class PackingView(View):
             rom_to_copy = romfile
             if request.POST.get('region') in ('US', 'EU'):
                 romcompressed = os.path.join(dumpdir, 'rom_compressed.sfc')
-                nlzss.encode_file(romfile, romcompressed)
+                with timing.measure('lz', 'LZ compression'):
+                    nlzss.encode_file(romfile, romcompressed)
                 rom_to_copy = romcompressed
 
-            # Dump WAD file
-            wadf = Wii.WAD.load(request.FILES['wad'].read())
-            wadf.dumpDir(dumpdir)
+            with timing.measure('wad_unpack', 'WAD unpack'):
+                # Dump WAD file
+                wadf = Wii.WAD.load(request.FILES['wad'].read())
+                wadf.dumpDir(dumpdir)
 
-            # Dump U8 archive
-            u8file = os.path.join(dumpdir, '00000005.app')
-            u8unpackdir = u8file + '_unpacked'
-            u8archive = Wii.U8.loadFile(u8file)
-            u8archive.dumpDir(u8unpackdir)
+                # Dump U8 archive
+                u8file = os.path.join(dumpdir, '00000005.app')
+                u8unpackdir = u8file + '_unpacked'
+                u8archive = Wii.U8.loadFile(u8file)
+                u8archive.dumpDir(u8unpackdir)
 
             # Copy randomized ROM over
             for f in os.listdir(u8unpackdir):
@@ -292,13 +329,14 @@ class PackingView(View):
                     shutil.copyfile(rom_to_copy, wadrom)
                     break
 
-            # Put U8 archive back together
-            newu8 = Wii.U8.loadDir(u8unpackdir)
-            newu8.dumpFile(u8file)
+            with timing.measure('wad_repack', 'WAD repack'):
+                # Put U8 archive back together
+                newu8 = Wii.U8.loadDir(u8unpackdir)
+                newu8.dumpFile(u8file)
 
-            # Build new WAD
-            newwadfile = os.path.join(dumpdir, 'smrpg_randomized.wad')
-            newwad = Wii.WAD.loadDir(dumpdir)
+                # Build new WAD
+                newwadfile = os.path.join(dumpdir, 'smrpg_randomized.wad')
+                newwad = Wii.WAD.loadDir(dumpdir)
 
             # Make new channel title with seed (sync for all languages).
             # Read title from ROM and make sure it's in the correct spot.  If not, leave the title alone.
@@ -354,12 +392,27 @@ class PackingView(View):
             newwad.tmd.setTitleID(tid)
             newwad.tik.setTitleID(tid)
 
-            newwad.dumpFile(newwadfile, fakesign=False)
+            with timing.measure('wad_write', 'WAD write'):
+                newwad.dumpFile(newwadfile, fakesign=False)
 
             # Return new WAD file
             response = HttpResponse(open(newwadfile, 'rb'), content_type='application/octet-stream')
             response['Content-Disposition'] = 'attachment; filename="smrpg.wad"'
-            return response
+            return timing.apply(response)
+
+
+class MetricsView(View):
+    @staticmethod
+    def get(request):
+        """Generation metrics in the Prometheus text format, for staff users or scrapers sending the METRICS_TOKEN
+        bearer token.
+        """
+        authorization = request.headers.get('Authorization', '')
+        has_token = bool(settings.METRICS_TOKEN) and hmac.compare_digest(
+            authorization.encode(), 'Bearer {}'.format(settings.METRICS_TOKEN).encode())
+        if not has_token and not request.user.is_staff:
+            return HttpResponseForbidden()
+        return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
 
 
 # ************** API views
@@ -3,6 +3,7 @@ Django settings for smrpg_web_randomizer project.
 """
 
 import os
+import tempfile
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -145,3 +146,25 @@ DATA_UPLOAD_MAX_MEMORY_SIZE = 1024 * 1024 * 25  # 25 MB
 
 # Beta site flag.
 BETA = bool(os.environ.get("BETA", default=0))
+
+# Seconds allowed to generate a seed before giving up, to stay well under the gunicorn worker timeout.  0 disables it.
+GENERATION_TIMEOUT = float(os.environ.get("GENERATION_TIMEOUT", default=20))
+
+# Directory where each worker process writes its generation metrics, so the metrics endpoint reports all of them.  It
+# should be cleared when the server starts.  If not set, the endpoint only reports the worker that serves it.
+METRICS_DIR = os.environ.get("METRICS_DIR", "")
+
+# Bearer token a Prometheus scraper sends to read the metrics endpoint.  Without it, only staff users can read it.
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
+# Built-in sampling profiler for seed generation.  PROFILE_SAMPLE_RATE is the fraction of generate requests to profile,
+# and staff users can also profile a single request by sending the X-Profile header.  Each profile is written to
+# PROFILE_DIR as collapsed stacks for flame graph tools, sampling the stack every PROFILE_INTERVAL seconds.
+PROFILE_DIR = os.environ.get("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "smrpg-profiles"))
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", default=0))
+PROFILE_INTERVAL = float(os.environ.get("PROFILE_INTERVAL", default=0.005))
+
+# Seeds that take longer than SLOW_SEED_THRESHOLD seconds to generate are recorded with their per-phase timings so they
+# can be replayed with the replayslow command, keeping only the newest SLOW_SEED_LIMIT of them.  0 disables it.
+SLOW_SEED_THRESHOLD = float(os.environ.get("SLOW_SEED_THRESHOLD", default=5))
+SLOW_SEED_LIMIT = int(os.environ.get("SLOW_SEED_LIMIT", default=500))